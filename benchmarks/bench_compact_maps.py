@@ -0,0 +1,69 @@
+"""
+Benchmark of compact maps (sampled grid expanded with bilinear interpolation and exact exception pixels)
+against full float32 maps and float16 maps: memory, error, time to compact, expand and build.
+
+Run from the project root:
+    $ python3 benchmarks/bench_compact_maps.py [camera_parameter.json] [step]
+"""
+import glob
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.models.compact_maps import CompactMaps  # noqa: E402
+from src.models.moil_maps import MoilMaps  # noqa: E402
+
+VIEWS = (("anypoint 0,0,2", lambda m: m.maps_anypoint(0, 0, 2)),
+         ("anypoint 75,30,2", lambda m: m.maps_anypoint(75, 30, 2)),
+         ("anypoint 110,-60,1.2", lambda m: m.maps_anypoint(110, -60, 1.2)),
+         ("car 60,30,20,2", lambda m: m.maps_anypoint_car(60, 30, 20, 2)),
+         ("panorama 10,110", lambda m: m.maps_panorama(10, 110)))
+
+
+def max_error(maps, reference):
+    """
+        This function is for get largest coordinate error of maps against reference maps
+    Args:
+        maps: maps_x, maps_y
+        reference: maps_x, maps_y
+
+    Returns:
+        error in pixel
+    """
+    return max(float(np.abs(m.astype(np.float32) - r).max()) for m, r in zip(maps, reference))
+
+
+def main():
+    file_path = sys.argv[1] if len(sys.argv) > 1 else sorted(glob.glob("camera_parameter/*.json"))[0]
+    step = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    moil_maps = MoilMaps.from_json(file_path)
+    image = np.random.randint(0, 255, (moil_maps.camera_parameter.image_height,
+                                       moil_maps.camera_parameter.image_width, 3), np.uint8)
+    print("%-22s %9s %9s %9s %9s %9s %9s %9s %9s %9s %9s" % (
+        "view", "full KB", "compact", "except.", "error px", "f16 err", "build ms", "compact", "expand", "diff px%", "max diff"))
+    for name, build in VIEWS:
+        start = time.perf_counter()
+        maps_x, maps_y = build(moil_maps)
+        build_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        compact = CompactMaps.from_maps(maps_x, maps_y, step)
+        compact_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        expanded = compact.expand()
+        expand_ms = (time.perf_counter() - start) * 1000
+        half = (maps_x.astype(np.float16), maps_y.astype(np.float16))
+        exact = cv2.remap(image, *cv2.convertMaps(maps_x, maps_y, cv2.CV_16SC2), cv2.INTER_LINEAR)
+        result = cv2.remap(image, *cv2.convertMaps(*expanded, cv2.CV_16SC2), cv2.INTER_LINEAR)
+        difference = cv2.absdiff(exact, result)
+        print("%-22s %9d %9d %9d %9.4f %9.3f %9.1f %9.1f %9.1f %9.3f %9d" % (
+            name, (maps_x.nbytes + maps_y.nbytes) // 1024, compact.nbytes // 1024, len(compact.exception_index),
+            max_error(expanded, (maps_x, maps_y)), max_error(half, (maps_x, maps_y)), build_ms, compact_ms,
+            expand_ms, difference.any(axis=2).mean() * 100, difference.max()))
+
+
+if __name__ == "__main__":
+    main()
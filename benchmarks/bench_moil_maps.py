@@ -0,0 +1,93 @@
+"""
+Benchmark of the numpy map generator (src.models.moil_maps) against moildev.
+
+Run from the project root:
+    $ python3 benchmarks/bench_moil_maps.py [camera_parameter.json]
+
+The comparison with moildev is done only when moildev package is installed, the difference is measured
+on pixels that both generators map inside the source image. moildev maps are rounded to integer pixels,
+so the expected difference is 0.5 px. moildev 4.0 ignores roll of car mode, car views are compared
+without roll.
+"""
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.models.moil_maps import CameraParameter, MoilMaps  # noqa: E402
+
+TOLERANCE = 1.0
+REPEAT = 5
+VIEWS = [("maps_anypoint", (0, 0, 2, 1)), ("maps_anypoint", (75, 0, 2, 1)), ("maps_anypoint", (65, 90, 2, 1)),
+         ("maps_anypoint", (30, 200, 1.5, 1)), ("maps_anypoint_car", (50, 0, 0, 2)),
+         ("maps_anypoint_car", (0, -75, 0, 2)), ("maps_anypoint_car", (20, 30, 0, 3)),
+         ("maps_panorama", (10, 110)), ("maps_panorama", (30, 90))]
+# names of moildev 4.0 functions
+MOILDEV_FUNCTIONS = {"maps_anypoint": "maps_anypoint_mode1", "maps_anypoint_car": "maps_anypoint_mode2",
+                     "maps_panorama": "maps_panorama_tube"}
+
+
+def measure(function, *args):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        maps = function(*args)
+    return (time.perf_counter() - start) / REPEAT * 1000, maps
+
+
+def connect_moildev(file_path, camera_name, single_camera):
+    try:
+        from moildev import Moildev
+    except ImportError:
+        return None
+    if single_camera:
+        # moildev only take the camera name of a file with several cameras
+        return Moildev(file_path)
+    try:
+        return Moildev(file_path, camera_name)
+    except TypeError:
+        return Moildev(file_path)
+
+
+def moildev_function(moildev, name):
+    if hasattr(moildev, name):
+        return getattr(moildev, name)
+    function = getattr(moildev, MOILDEV_FUNCTIONS[name])
+    if name == "maps_anypoint":
+        return lambda alpha, beta, zoom, mode: function(alpha, beta, zoom)
+    return function
+
+
+def max_difference(maps, reference, width, height):
+    inside = (maps[0] >= 0) & (maps[0] < width) & (maps[1] >= 0) & (maps[1] < height) & \
+             (reference[0] > 0) & (reference[0] < width) & (reference[1] > 0) & (reference[1] < height)
+    if not inside.any():
+        return float("nan")
+    return float(max(np.abs(maps[0] - reference[0])[inside].max(), np.abs(maps[1] - reference[1])[inside].max()))
+
+
+def main():
+    files = sys.argv[1:] or sorted(glob.glob("camera_parameter/*.json"))
+    for file_path in files:
+        moil_maps = MoilMaps.from_json(file_path)
+        parameter = moil_maps.camera_parameter
+        moildev = connect_moildev(file_path, parameter.camera_name,
+                                  CameraParameter.camera_names(file_path) == [parameter.camera_name])
+        print("%s (%dx%d)" % (parameter.camera_name, parameter.image_width, parameter.image_height))
+        if moildev is None:
+            print("  moildev is not installed, only numpy generator is measured")
+        for name, args in VIEWS:
+            numpy_ms, maps = measure(getattr(moil_maps, name), *args)
+            line = "  %-18s %-18s numpy %8.1f ms" % (name, args, numpy_ms)
+            if moildev is not None:
+                moildev_ms, reference = measure(moildev_function(moildev, name), *args)
+                difference = max_difference(maps, reference, parameter.image_width, parameter.image_height)
+                line += "  moildev %8.1f ms  max difference %6.2f px %s" % (
+                    moildev_ms, difference, "ok" if difference <= TOLERANCE else "OVER TOLERANCE")
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark of per frame remap with float32 maps and fixed-point (CV_16SC2) maps.
+
+Run from the project root:
+    $ python3 benchmarks/bench_remap_fixed_point.py
+
+The maps are synthetic anypoint-like maps with the size of Entaniya 2592x1944 source image,
+the remap cost depends only on maps size and source image size, not on the lens.
+"""
+import time
+
+import cv2
+import numpy as np
+
+WIDTH, HEIGHT = 2592, 1944
+REPEAT = 30
+
+
+def synthetic_maps(width, height):
+    """
+        This function is for create a smooth, non trivial maps like a dewarping maps
+    Args:
+        width: width of maps
+        height: height of maps
+
+    Returns:
+        maps_x, maps_y in float32
+    """
+    u, v = np.meshgrid(np.linspace(-1, 1, width, dtype=np.float32), np.linspace(-1, 1, height, dtype=np.float32))
+    radius = np.sqrt(u * u + v * v) * 0.6
+    angle = np.arctan2(v, u) + 0.3
+    maps_x = (width / 2 + radius * np.cos(angle) * height / 2).astype(np.float32)
+    maps_y = (height / 2 + radius * np.sin(angle) * height / 2).astype(np.float32)
+    return maps_x, maps_y
+
+
+def measure(image, map1, map2, interpolation):
+    cv2.remap(image, map1, map2, interpolation)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        cv2.remap(image, map1, map2, interpolation)
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    image = np.random.randint(0, 255, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    maps_x, maps_y = synthetic_maps(WIDTH, HEIGHT)
+
+    start = time.perf_counter()
+    fixed_xy, fixed_interpolation = cv2.convertMaps(maps_x, maps_y, cv2.CV_16SC2)
+    convert_ms = (time.perf_counter() - start) * 1000
+
+    float_bytes = maps_x.nbytes + maps_y.nbytes
+    fixed_bytes = fixed_xy.nbytes + fixed_interpolation.nbytes
+    float_ms = measure(image, maps_x, maps_y, cv2.INTER_LINEAR)
+    fixed_ms = measure(image, fixed_xy, fixed_interpolation, cv2.INTER_LINEAR)
+
+    error = np.abs(cv2.remap(image, maps_x, maps_y, cv2.INTER_LINEAR).astype(np.int16) -
+                   cv2.remap(image, fixed_xy, fixed_interpolation, cv2.INTER_LINEAR).astype(np.int16))
+
+    print("source %dx%d, %d repeat" % (WIDTH, HEIGHT, REPEAT))
+    print("convert maps once      : %8.2f ms" % convert_ms)
+    print("float32 maps   remap   : %8.2f ms/frame, maps %6.1f MB" % (float_ms, float_bytes / 1e6))
+    print("CV_16SC2 maps  remap   : %8.2f ms/frame, maps %6.1f MB" % (fixed_ms, fixed_bytes / 1e6))
+    print("speed up               : %8.2f x" % (float_ms / fixed_ms))
+    print("max pixel difference   : %8d" % error.max())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Micro benchmark of rho to alpha conversion: precomputed table with linear interpolation
+(MoilMaps.get_alpha_from_rho) against solving the lens polynomial root for every pixel.
+
+Run from the project root:
+    $ python3 benchmarks/bench_rho_to_alpha.py [camera_parameter.json]
+"""
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.models.moil_maps import MoilMaps  # noqa: E402
+
+ROOT_SAMPLES = 2000
+TABLE_SAMPLES = 2592 * 1944
+
+
+def solve_root(camera_parameter, rho, max_alpha):
+    """
+        This function is for solve alpha of a rho by polynomial root, the reference of the table
+    Args:
+        camera_parameter: CameraParameter
+        rho: image radius in pixel
+        max_alpha: upper limit of valid incident angle in radian
+
+    Returns:
+        alpha in radian
+    """
+    coefficients = [c * camera_parameter.calibration_ratio for c in camera_parameter.coefficients] + [-rho]
+    roots = np.roots(coefficients)
+    roots = roots[(np.abs(roots.imag) < 1e-9) & (roots.real >= 0) & (roots.real <= max_alpha + 1e-9)].real
+    return roots.min()
+
+
+def main():
+    file_path = sys.argv[1] if len(sys.argv) > 1 else sorted(glob.glob("camera_parameter/*.json"))[0]
+    start = time.perf_counter()
+    moil_maps = MoilMaps.from_json(file_path)
+    build_ms = (time.perf_counter() - start) * 1000
+    parameter = moil_maps.camera_parameter
+    max_rho = moil_maps.rho_table[-1]
+
+    rho = np.random.uniform(0, max_rho, ROOT_SAMPLES)
+    start = time.perf_counter()
+    reference = np.array([solve_root(parameter, r, moil_maps.max_alpha) for r in rho])
+    root_us = (time.perf_counter() - start) / ROOT_SAMPLES * 1e6
+
+    rho_frame = np.random.uniform(0, max_rho, TABLE_SAMPLES)
+    start = time.perf_counter()
+    moil_maps.get_alpha_from_rho(rho_frame)
+    table_us = (time.perf_counter() - start) / TABLE_SAMPLES * 1e6
+
+    error = np.abs(moil_maps.get_alpha_from_rho(rho) - np.degrees(reference)).max()
+    print("%s, table %d samples up to alpha %.2f deg (rho %.1f px)" % (
+        parameter.camera_name, len(moil_maps.alpha_table), np.degrees(moil_maps.max_alpha), max_rho))
+    print("build table            : %10.2f ms" % build_ms)
+    print("root solve             : %10.3f us/pixel" % root_us)
+    print("table interpolation    : %10.3f us/pixel" % table_us)
+    print("speed up               : %10.0f x" % (root_us / table_us))
+    print("error bound (table)    : %10.2e deg" % np.degrees(moil_maps.rho_to_alpha_error))
+    print("max error vs root      : %10.2e deg" % error)
+
+
+if __name__ == "__main__":
+    main()
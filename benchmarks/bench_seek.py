@@ -0,0 +1,91 @@
+"""
+Benchmark of video seeking: cv2.CAP_PROP_POS_FRAMES against FrameSeeker (keyframe index, decode forward
+to the exact frame), for random jumps and for small forward steps like slider nudges.
+The decoded frame is compared with the frame read sequentially.
+
+Run from the project root:
+    $ python3 benchmarks/bench_seek.py video.mp4 [seeks]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from src.models.video_index import FrameSeeker  # noqa: E402
+
+
+def reference_frames(file_path):
+    """
+        This function is for read a small sample of every frame sequentially, the reference of seeking
+    Args:
+        file_path: path of video
+
+    Returns:
+        list of sampled frames
+    """
+    cap = cv2.VideoCapture(file_path)
+    frames = []
+    while True:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(frame[::16, ::16].copy())
+    cap.release()
+    return frames
+
+
+def run(name, seek, cap, targets, frames):
+    """
+        This function is for seek every target and read the frame
+    Args:
+        name: name of method
+        seek: function (position) that set the capture
+        cap: cv2.VideoCapture
+        targets: list of frame positions
+        frames: reference frames
+
+    Returns:
+        None
+    """
+    latencies = []
+    exact = 0
+    for target in targets:
+        start = time.perf_counter()
+        seek(target)
+        success, frame = cap.read()
+        latencies.append((time.perf_counter() - start) * 1000)
+        exact += success and np.array_equal(frame[::16, ::16], frames[target])
+    print("%-28s mean %8.1f ms  max %8.1f ms  exact %d/%d" % (
+        name, np.mean(latencies), np.max(latencies), exact, len(targets)))
+
+
+def main():
+    file_path = sys.argv[1]
+    seeks = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    frames = reference_frames(file_path)
+    random.seed(0)
+    jumps = [random.randrange(len(frames)) for _ in range(seeks)]
+    start = random.randrange(len(frames) // 2)
+    nudges = [min(len(frames) - 1, start + 2 * i) for i in range(seeks)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        start_time = time.perf_counter()
+        cap = cv2.VideoCapture(file_path)
+        seeker = FrameSeeker(cap, file_path, directory=directory)
+        seeker.wait_ready()
+        print("%d frames, %d keyframes, index built in %.1f ms" % (
+            len(frames), len(seeker.keyframes or ()), (time.perf_counter() - start_time) * 1000))
+        for targets, kind in ((jumps, "random jump"), (nudges, "forward step 2")):
+            reference = cv2.VideoCapture(file_path)
+            run("CAP_PROP_POS_FRAMES " + kind, lambda p: reference.set(cv2.CAP_PROP_POS_FRAMES, p), reference,
+                targets, frames)
+            run("FrameSeeker " + kind, lambda p: seeker.seek(p), cap, targets, frames)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Headless batch dewarping of fisheye images, without user interface.
+
+Every view maps are built once from the camera parameter json, and the decode-remap-encode work of
+every image is shared by a process pool.
+
+Example, run from the project root:
+    $ python3 -m src.batch_dewarp example_source/images camera_parameter/20220707_entaniya_vr220_3_2592x1944_moil230_andy.json \\
+          --view front=anypoint:0,0,2 --view up=anypoint:75,0,2 --view panorama:10,110 -o output -j 4
+
+View text is "[name=]mode:values", mode is anypoint (alpha, beta, zoom), car (alpha, beta, roll, zoom)
+or panorama (alpha_min, alpha_max).
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from src.models.map_store import MapStore, parameter_digest
+from src.models.moil_maps import MoilMaps
+from src.models.view_spec import ViewSpec
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+
+_worker_maps = None
+_worker_image_size = None
+_worker_output = None
+_worker_extension = None
+_worker_interpolation = None
+
+
+def _init_worker(maps, image_size, output_directory, extension, interpolation):
+    """
+        This function is for keep the maps in every worker process, the maps are sent once per worker
+    """
+    global _worker_maps, _worker_image_size, _worker_output, _worker_extension, _worker_interpolation
+    cv2.setNumThreads(1)
+    _worker_maps = maps
+    _worker_image_size = image_size
+    _worker_output = output_directory
+    _worker_extension = extension
+    _worker_interpolation = interpolation
+
+
+def _dewarp_file(file_path):
+    """
+        This function is for dewarp one image to every view, run in worker process. An image that does not
+        have the size of the camera parameter is not dewarped, the maps would give a meaningless result
+    Args:
+        file_path: path of fisheye image
+
+    Returns:
+        number of written images, size of image (width, height), None if the image can not be read
+    """
+    image = cv2.imread(file_path)
+    if image is None:
+        return 0, None
+    size = (image.shape[1], image.shape[0])
+    if size != _worker_image_size:
+        return 0, size
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    written = 0
+    for name, (map1, map2) in _worker_maps.items():
+        result = cv2.remap(image, map1, map2, _worker_interpolation)
+        if cv2.imwrite(os.path.join(_worker_output, "%s_%s%s" % (stem, name, _worker_extension)), result):
+            written += 1
+    return written, size
+
+
+def list_images(input_directory):
+    """
+        This function is for list image files in a directory
+    Args:
+        input_directory: directory of images
+
+    Returns:
+        sorted list of image path
+    """
+    return sorted(os.path.join(input_directory, f) for f in os.listdir(input_directory)
+                  if f.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def open_map_store():
+    """
+        This function is for open the map store shared with the user interface
+    Returns:
+        MapStore, None if the store directory can not be created
+    """
+    try:
+        return MapStore()
+    except OSError:
+        return None
+
+
+def build_view_maps(moil_maps, views, fixed_point=True, map_store=None, digest=None):
+    """
+        This function is for build maps of every view once, maps already in the map store are read from disk
+        and new maps are written into it
+    Args:
+        moil_maps: MoilMaps
+        views: list of ViewSpec
+        fixed_point: convert maps to OpenCV fixed-point maps
+        map_store: MapStore, None build every maps
+        digest: digest of camera parameter file from parameter_digest(), used with map_store
+
+    Returns:
+        dictionary of view name and (map1, map2)
+    """
+    maps = {}
+    for view in views:
+        view_key = view.key(None)[1:]
+        stored = map_store.get(digest, view_key) if map_store is not None else None
+        if stored is None:
+            maps_x, maps_y = view.build_maps(moil_maps)
+            if map_store is not None:
+                map_store.put(digest, view_key, (maps_x, maps_y))
+        else:
+            maps_x, maps_y = stored
+        if fixed_point:
+            maps_x, maps_y = cv2.convertMaps(maps_x, maps_y, cv2.CV_16SC2)
+        maps[view.name] = (maps_x, maps_y)
+    return maps
+
+
+def dewarp_directory(input_directory, camera_parameter, views, output_directory, workers=None, camera_name=None,
+                     extension=".jpg", fixed_point=True, interpolation=cv2.INTER_LINEAR, store_maps=True):
+    """
+        This function is for dewarp every image of a directory to every view with a process pool
+    Args:
+        input_directory: directory of fisheye images
+        camera_parameter: path of camera parameter json
+        views: list of ViewSpec
+        output_directory: directory of result images
+        workers: number of worker process, default is number of cpu
+        camera_name: name of camera when the json file contain several cameras
+        extension: extension of result images
+        fixed_point: use fixed-point maps
+        interpolation: OpenCV interpolation
+        store_maps: read and write maps in the map store
+
+    Returns:
+        dictionary of images, written results, skipped images (path, (width, height)) that do not have the
+        image size of the camera parameter, seconds and images per second
+    """
+    names = [view.name for view in views]
+    if len(set(names)) != len(names):
+        raise ValueError("view names must be unique: %s" % ", ".join(names))
+    workers = workers or os.cpu_count() or 1
+    files = list_images(input_directory)
+    os.makedirs(output_directory, exist_ok=True)
+    start = time.perf_counter()
+    moil_maps = MoilMaps.from_json(camera_parameter, camera_name)
+    image_size = moil_maps.maps_size()
+    maps = build_view_maps(moil_maps, views, fixed_point, open_map_store() if store_maps else None,
+                           parameter_digest(camera_parameter, camera_name))
+    maps_seconds = time.perf_counter() - start
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(maps, image_size, output_directory, extension, interpolation)) as executor:
+        chunk_size = max(1, len(files) // (4 * workers))
+        results = list(executor.map(_dewarp_file, files, chunksize=chunk_size))
+    seconds = time.perf_counter() - start
+    skipped = [(file_path, size) for file_path, (_, size) in zip(files, results)
+               if size is not None and size != image_size]
+    return {"images": len(files), "written": sum(written for written, _ in results), "skipped": skipped,
+            "image_size": image_size, "maps_seconds": maps_seconds, "seconds": seconds,
+            "images_per_second": len(files) / seconds if seconds else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Dewarp a directory of fisheye images without user interface")
+    parser.add_argument("input_directory", help="directory of fisheye images")
+    parser.add_argument("camera_parameter", help="camera parameter json file")
+    parser.add_argument("--view", action="append", required=True, type=ViewSpec.parse,
+                        help="view '[name=]anypoint:alpha,beta,zoom', '[name=]car:alpha,beta,roll,zoom' "
+                             "or '[name=]panorama:alpha_min,alpha_max', can be repeated")
+    parser.add_argument("-o", "--output", default="output", help="directory of result images")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker process")
+    parser.add_argument("--camera-name", default=None, help="camera name when the json contain several cameras")
+    parser.add_argument("--format", default="jpg", help="extension of result images (jpg, png, ...)")
+    parser.add_argument("--quality", action="store_true", help="float maps and cubic interpolation")
+    parser.add_argument("--no-map-store", action="store_true", help="do not read or write maps in the map store")
+    args = parser.parse_args(argv)
+
+    report = dewarp_directory(args.input_directory, args.camera_parameter, args.view, args.output, args.workers,
+                              args.camera_name, "." + args.format.lstrip("."), fixed_point=not args.quality,
+                              interpolation=cv2.INTER_CUBIC if args.quality else cv2.INTER_LINEAR,
+                              store_maps=not args.no_map_store)
+    print("%d images, %d views, %d results written in %.2f s (maps %.2f s), %.2f images/second" % (
+        report["images"], len(args.view), report["written"], report["seconds"], report["maps_seconds"],
+        report["images_per_second"]))
+    for file_path, (width, height) in report["skipped"]:
+        print("skipped %s: %dx%d image, the camera parameter is for %dx%d images" % (
+            (file_path, width, height) + report["image_size"]))
+    return 0 if report["written"] == report["images"] * len(args.view) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
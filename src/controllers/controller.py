@@ -1,9 +1,13 @@
 # import necessary library you used here
-from PyQt6 import QtGui, QtCore
+from PyQt6 import QtGui, QtCore, QtWidgets
 from .resource_icon import *
 from src.views.ui_template import Ui_MainWindow
 from src.models.moilutils import mutils
 from src.models.model import Model
+from src.models.moil_maps import CameraParameter
+from .frame_signal import FrameSignal
+from .label_display import LabelDisplay
+from .slider_preview import SliderThumbnailPreview
 
 
 class Controller(Ui_MainWindow):
@@ -19,20 +23,38 @@ class Controller(Ui_MainWindow):
         super().__init__()
         self.setupUi(parent)
         self.model = Model()
+        self.display_original = LabelDisplay(self.lbl_original, self.model.preview_width)
+        self.display_result = LabelDisplay(self.lbl_result, 1000)
+        self.slider_preview = SliderThumbnailPreview(self.slider_video, self.model.get_thumbnail)
         self.maps_x, self.maps_y = None, None
         self.cap = None
         self.moildev = None
 
-        self.timer = QtCore.QTimer()
-        self.timer.timeout.connect(self.reload_to_ui)
+        self.frame_signal = FrameSignal()
+        self.frame_signal.frame_ready.connect(self.paint_latest_frame)
+        self.frame_signal.finished.connect(self.playback_finished)
+        self.frame_signal.maps_refined.connect(self.show_to_ui)
+        self.model.on_maps_refined = self.frame_signal.notify_maps_refined
+        self.frame_signal.recording_stopped.connect(self.recording_stopped)
+        self.model.on_recording_stopped = self.frame_signal.notify_recording_stopped
         self.camera = False
 
+        self.parameter_update_interval = 33
+        self.pending_mode_view = None
+        self.parameter_timer = QtCore.QTimer()
+        self.parameter_timer.setSingleShot(True)
+        self.parameter_timer.timeout.connect(self.apply_parameter_update)
+
         self.hide_ui()
         self.set_icon_video_controller()
         self.set_icon_anypoint_controller()
         self.set_icon_play_pause()
 
         self.connect_action()
+        application = QtCore.QCoreApplication.instance()
+        if application is not None:
+            # the recorded video is not readable before it is closed
+            application.aboutToQuit.connect(self.model.stop_recording)
 
     def connect_action(self):
         """
@@ -70,7 +92,9 @@ class Controller(Ui_MainWindow):
         self.spinBox_alpha_min.valueChanged.connect(self.change_properties_panorama_from_ui)
 
         self.btn_save_image.clicked.connect(self.save_image)
+        self.btn_record.clicked.connect(self.onclick_record)
         self.btn_change_param.clicked.connect(self.change_camera_type)
+        self.btn_load_param.clicked.connect(self.load_camera_parameter)
 
         self.btn_parameter_config.clicked.connect(self.parameter_configuration)
 
@@ -88,9 +112,9 @@ class Controller(Ui_MainWindow):
             print(self.model.data_properties.properties_video["video"])
             if self.model.data_properties.properties_video["video"]:
                 self.frame_video_controller.show()
-                self.model.running_video()
                 self.initial_open_media()
-                self.reload_to_ui()
+                # load_media opened the video and read its first frame
+                self.update_video_to_ui()
             else:
 
                 self.frame_video_controller.hide()
@@ -184,11 +208,10 @@ class Controller(Ui_MainWindow):
         self.model.data_properties.properties_anypoint["beta"] = self.spinBox_beta.value()
         self.model.data_properties.properties_anypoint["roll"] = self.spinBox_roll.value()
         self.model.data_properties.properties_anypoint["zoom"] = self.doubleSpinBox_zoom.value()
-        self.change_mode_view("Anypoint")
         if self.model.data_properties.properties_video["video"]:
             self.btn_play_pause.setChecked(False)
-            self.timer.stop()
-        self.show_to_ui()
+            self.stop_playback()
+        self.schedule_parameter_update("Anypoint")
 
     def change_properties_panorama_from_ui(self):
         """
@@ -198,11 +221,34 @@ class Controller(Ui_MainWindow):
         """
         self.model.data_properties.properties_panorama["alpha_max"] = self.spinBox_alpha_max.value()
         self.model.data_properties.properties_panorama["alpha_min"] = self.spinBox_alpha_min.value()
-        self.change_mode_view("Panorama")
         if self.model.data_properties.properties_video["video"]:
             self.btn_play_pause.setChecked(False)
-            self.timer.stop()
-        self.show_to_ui()
+            self.stop_playback()
+        self.schedule_parameter_update("Panorama")
+
+    def schedule_parameter_update(self, mode_view):
+        """
+            This function is for coalesce burst of parameter changes from spinbox, the maps are rebuilt once
+            per parameter_update_interval with the latest parameters
+        Args:
+            mode_view: mode view to apply
+
+        Returns:
+            None
+        """
+        self.pending_mode_view = mode_view
+        if not self.parameter_timer.isActive():
+            self.parameter_timer.start(self.parameter_update_interval)
+
+    def apply_parameter_update(self):
+        """
+            This function is for apply the latest pending parameter change, connected to parameter timer
+        Returns:
+            None
+        """
+        mode_view, self.pending_mode_view = self.pending_mode_view, None
+        if mode_view is not None:
+            self.change_mode_view(mode_view)
 
     def change_ui_from_properties_anypoint(self):
         """
@@ -243,6 +289,8 @@ class Controller(Ui_MainWindow):
             None
         """
         self.set_icon_play_pause()
+        # key is taken before the images, a newer image with older key is only repainted again next time
+        key = self.model.display_key()
         if self.model.data_properties.mode_view != "Fisheye":
             image = self.model.data_properties.image_drawing
         else:
@@ -250,17 +298,16 @@ class Controller(Ui_MainWindow):
 
         image2 = self.model.data_properties.image_result
         if image is not None:
-            self.model.mutils.show_image_to_label(self.lbl_original, image, 320)
+            self.display_original.show(image, key)
         if image2 is not None:
-            self.model.mutils.show_image_to_label(self.lbl_result, image2, 1000)
+            self.display_result.show(image2, key)
 
-    def reload_to_ui(self):
+    def update_video_to_ui(self):
         """
             This function is for video only and can update view depend on length of the video
         Returns:
             None
         """
-        self.model.next_frame()
         self.show_to_ui()
         self.set_value_slider_video()
         if self.camera:
@@ -268,9 +315,47 @@ class Controller(Ui_MainWindow):
         else:
             if self.model.data_properties.properties_video["frame_count"] == \
                     self.model.data_properties.properties_video["pos_frame"]:
-                self.timer.stop()
+                self.stop_playback()
         self.set_time_video()
 
+    def paint_latest_frame(self):
+        """
+            This function is for paint the latest frame from playback pipeline, connected to frame signal
+        Returns:
+            None
+        """
+        if self.frame_signal.take_frame() and self.model.pipeline is not None:
+            self.update_video_to_ui()
+
+    def start_playback(self):
+        """
+            This function is for start playback pipeline, capture and processing run outside user interface thread
+        Returns:
+            None
+        """
+        self.model.start_pipeline(on_frame_ready=self.frame_signal.notify_frame_ready,
+                                  on_finished=self.frame_signal.notify_finished)
+
+    def stop_playback(self):
+        """
+            This function is for stop playback pipeline
+        Returns:
+            None
+        """
+        self.model.stop_pipeline()
+        # the paused frame may be rendered again in full quality
+        self.show_to_ui()
+
+    def playback_finished(self):
+        """
+            This function is for update button when video reach the end
+        Returns:
+            None
+        """
+        self.stop_playback()
+        self.btn_play_pause.setChecked(False)
+        self.set_icon_play_pause()
+
     def onclick_play_pause_video(self):
         """
             This function is for action play pause video and icon
@@ -279,9 +364,9 @@ class Controller(Ui_MainWindow):
         """
         if self.model.data_properties.image_result is not None:
             if self.btn_play_pause.isChecked():
-                self.timer.start()
+                self.start_playback()
             else:
-                self.timer.stop()
+                self.stop_playback()
             self.set_icon_play_pause()
 
     def onclick_stop_video(self):
@@ -291,9 +376,10 @@ class Controller(Ui_MainWindow):
             None
         """
         self.btn_play_pause.setChecked(False)
+        self.stop_playback()
         self.model.stop_video()
-        self.timer.stop()
-        self.reload_to_ui()
+        # the frame at the new position is already read by the model
+        self.update_video_to_ui()
 
     def onclick_rewind_video(self):
         """
@@ -302,9 +388,10 @@ class Controller(Ui_MainWindow):
 
         """
         self.btn_play_pause.setChecked(False)
+        self.stop_playback()
         self.model.rewind_video()
-        self.timer.stop()
-        self.reload_to_ui()
+        # the frame at the new position is already read by the model
+        self.update_video_to_ui()
 
     def onclick_forward_video(self):
         """
@@ -313,9 +400,10 @@ class Controller(Ui_MainWindow):
 
         """
         self.btn_play_pause.setChecked(False)
+        self.stop_playback()
         self.model.forward_video()
-        self.timer.stop()
-        self.reload_to_ui()
+        # the frame at the new position is already read by the model
+        self.update_video_to_ui()
 
     def onclick_slider_video(self, value):
         """
@@ -328,7 +416,9 @@ class Controller(Ui_MainWindow):
         """
         value_max = self.slider_video.maximum()
         self.model.slider_controller(value, value_max)
-        self.reload_to_ui()
+        # during playback the frame at the new position is painted by paint_latest_frame
+        if self.model.pipeline is None:
+            self.update_video_to_ui()
 
     def hide_ui(self):
         """
@@ -346,12 +436,37 @@ class Controller(Ui_MainWindow):
         Returns:
             None
         """
-        self.timer.stop()
+        self.stop_playback()
         self.btn_play_pause.setChecked(False)
         path = self.model.mutils.select_directory(None, ".")
         if path:
             self.model.save_image(path)
 
+    def onclick_record(self):
+        """
+            This function is for start or stop recording the result view into a video
+        Returns:
+            None
+        """
+        if not self.btn_record.isChecked():
+            self.model.stop_recording()
+            return
+        path = None
+        if self.model.cap is not None:
+            path = self.model.mutils.select_directory(None, ".")
+        if path:
+            self.model.start_recording(path)
+        else:
+            self.btn_record.setChecked(False)
+
+    def recording_stopped(self):
+        """
+            This function is for release the record button when the recording is stopped, connected to frame signal
+        Returns:
+            None
+        """
+        self.btn_record.setChecked(False)
+
     def parameter_configuration(self):
         """
             This function is for get action and do the form camera parameter
@@ -359,6 +474,8 @@ class Controller(Ui_MainWindow):
             None
         """
         self.model.mutils.form_camera_parameter()
+        # camera parameter can be edited in the form, maps in cache may be invalid
+        self.model.invalidate_maps()
 
     def change_camera_type(self):
         """
@@ -366,11 +483,35 @@ class Controller(Ui_MainWindow):
         Returns:
             None
         """
-        self.timer.stop()
+        self.stop_playback()
         self.btn_play_pause.setChecked(False)
         self.model.change_camera_type()
         self.show_to_ui()
 
+    def load_camera_parameter(self):
+        """
+            This function is for get action to load a camera parameter json file. The maps are then built by
+            MoilMaps (progressive maps, map store) and the camera type is not asked again for new media
+        Returns:
+            None
+        """
+        file_path = self.model.mutils.select_file(None, "Camera Parameter", "./camera_parameter", "*.json")
+        if not file_path:
+            return
+        names = CameraParameter.camera_names(file_path)
+        camera_name = None
+        if len(names) > 1:
+            camera_name, ok = QtWidgets.QInputDialog.getItem(self.centralwidget, "Camera Parameter", "Camera",
+                                                             names, 0, False)
+            if not ok:
+                return
+        self.stop_playback()
+        self.btn_play_pause.setChecked(False)
+        self.model.load_camera_parameter(file_path, camera_name)
+        if self.model.data_properties.image_original is not None:
+            self.model.create_maps()
+        self.show_to_ui()
+
     def initial_open_media(self):
         """
             This video is for set label and slider video controller to none
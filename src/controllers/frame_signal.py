@@ -0,0 +1,64 @@
+import threading
+
+from PyQt6 import QtCore
+
+
+class FrameSignal(QtCore.QObject):
+    frame_ready = QtCore.pyqtSignal()
+    finished = QtCore.pyqtSignal()
+    maps_refined = QtCore.pyqtSignal()
+    recording_stopped = QtCore.pyqtSignal()
+
+    def __init__(self):
+        """
+        Bridge from the playback threads to the user interface thread.
+        Notification from the processing thread is delivered to the user interface thread by Qt signal,
+        several notifications before the user interface paint are merged into one, so the user interface
+        only paint the latest processed frame.
+        """
+        super(FrameSignal, self).__init__()
+        self.__pending = threading.Event()
+
+    def notify_frame_ready(self):
+        """
+            This function is for notify new frame, called from processing thread
+        Returns:
+            None
+        """
+        if not self.__pending.is_set():
+            self.__pending.set()
+            self.frame_ready.emit()
+
+    def notify_finished(self):
+        """
+            This function is for notify the end of video, called from processing thread
+        Returns:
+            None
+        """
+        self.finished.emit()
+
+    def notify_maps_refined(self):
+        """
+            This function is for notify full resolution maps of progressive mode are ready, called from background thread
+        Returns:
+            None
+        """
+        self.maps_refined.emit()
+
+    def notify_recording_stopped(self):
+        """
+            This function is for notify the model closed the recorded videos
+        Returns:
+            None
+        """
+        self.recording_stopped.emit()
+
+    def take_frame(self):
+        """
+            This function is for mark the latest frame as painted, called from user interface thread
+        Returns:
+            True if there is frame to paint
+        """
+        pending = self.__pending.is_set()
+        self.__pending.clear()
+        return pending
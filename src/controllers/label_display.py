@@ -0,0 +1,61 @@
+import cv2
+import numpy as np
+from PyQt6 import QtGui
+
+
+class LabelDisplay(object):
+    def __init__(self, label, width):
+        """
+        Display stage from a BGR frame to QLabel.
+        The frame is resized by OpenCV to the label width first, converted to RGB into a buffer that is reused
+        across frames, and wrapped in a QImage without copy. The label is not repainted when the key of the
+        frame did not change.
+
+        Args:
+            label: QLabel to show the image
+            width: width of image in the label
+        """
+        super(LabelDisplay, self).__init__()
+        self.label = label
+        self.width = width
+        self.__resized = None
+        self.__rgb = None
+        self.__key = None
+
+    def invalidate(self):
+        """
+            This function is for force the next show to repaint the label
+        Returns:
+            None
+        """
+        self.__key = None
+
+    def show(self, image, key=None):
+        """
+            This function is for show image in the label
+        Args:
+            image: BGR or gray image
+            key: identity of image content, the label is not repainted if the key is the same as the last one
+
+        Returns:
+            True if the label is repainted
+        """
+        if key is not None and key == self.__key:
+            return False
+        height = max(1, round(image.shape[0] * self.width / image.shape[1]))
+        if self.__rgb is None or self.__rgb.shape[:2] != (height, self.width):
+            self.__rgb = np.empty((height, self.width, 3), dtype=np.uint8)
+        source = image
+        if image.shape[:2] != (height, self.width):
+            if self.__resized is None or self.__resized.shape != (height, self.width) + image.shape[2:] \
+                    or self.__resized.dtype != image.dtype:
+                self.__resized = cv2.resize(image, (self.width, height), interpolation=cv2.INTER_AREA)
+            else:
+                cv2.resize(image, (self.width, height), dst=self.__resized, interpolation=cv2.INTER_AREA)
+            source = self.__resized
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB if source.ndim == 3 else cv2.COLOR_GRAY2RGB, dst=self.__rgb)
+        q_image = QtGui.QImage(self.__rgb.data, self.width, height, self.__rgb.strides[0],
+                               QtGui.QImage.Format.Format_RGB888)
+        self.label.setPixmap(QtGui.QPixmap.fromImage(q_image))
+        self.__key = key
+        return True
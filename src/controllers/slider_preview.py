@@ -0,0 +1,64 @@
+import cv2
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+
+class SliderThumbnailPreview(QtCore.QObject):
+    def __init__(self, slider, get_thumbnail):
+        """
+        Thumbnail of the video shown above the slider at the position under the mouse.
+        Only the small thumbnails from the model are shown, hovering never seek or decode the video.
+
+        Args:
+            slider: QSlider of the video
+            get_thumbnail: function (value, maximum) that return (position, BGR thumbnail) or None
+        """
+        super(SliderThumbnailPreview, self).__init__(slider)
+        self.slider = slider
+        self.get_thumbnail = get_thumbnail
+        self.popup = QtWidgets.QLabel(slider.window(), QtCore.Qt.WindowType.ToolTip)
+        self.__position = None
+        slider.setMouseTracking(True)
+        slider.installEventFilter(self)
+
+    def eventFilter(self, source, event):
+        if source is self.slider:
+            if event.type() == QtCore.QEvent.Type.MouseMove:
+                self.show_at(int(event.position().x()))
+            elif event.type() in (QtCore.QEvent.Type.Leave, QtCore.QEvent.Type.Hide):
+                self.hide()
+        return False
+
+    def show_at(self, x):
+        """
+            This function is for show the thumbnail of the slider position under the mouse
+        Args:
+            x: x coordinate of mouse in the slider
+
+        Returns:
+            None
+        """
+        value = QtWidgets.QStyle.sliderValueFromPosition(self.slider.minimum(), self.slider.maximum(),
+                                                         x, self.slider.width())
+        result = self.get_thumbnail(value, self.slider.maximum())
+        if result is None:
+            self.hide()
+            return
+        position, thumbnail = result
+        if position != self.__position:
+            rgb = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB)
+            q_image = QtGui.QImage(rgb.data, rgb.shape[1], rgb.shape[0], rgb.strides[0],
+                                   QtGui.QImage.Format.Format_RGB888)
+            self.popup.setPixmap(QtGui.QPixmap.fromImage(q_image))
+            self.popup.adjustSize()
+            self.__position = position
+        point = self.slider.mapToGlobal(QtCore.QPoint(x - self.popup.width() // 2, -self.popup.height() - 4))
+        self.popup.move(point)
+        self.popup.show()
+
+    def hide(self):
+        """
+            This function is for hide the thumbnail
+        Returns:
+            None
+        """
+        self.popup.hide()
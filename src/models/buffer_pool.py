@@ -0,0 +1,67 @@
+import numpy as np
+
+
+class BufferPool(object):
+    def __init__(self, count=3):
+        """
+        Preallocated image buffers reused across frames, so the render loop does not allocate large arrays.
+        Every name has a ring of count buffers: the buffer given for a frame is only written again count frames
+        later, so the user interface can still read the last result while the next frames are rendered.
+        A buffer is allocated again only when the shape or type of the image change.
+
+        Args:
+            count: number of buffers in the ring of every name
+        """
+        super(BufferPool, self).__init__()
+        self.count = count
+        self.allocations = 0
+        self.allocated_bytes = 0
+        self.__rings = {}
+
+    def take(self, name, shape, dtype=np.uint8, count=None):
+        """
+            This function is for take the next buffer of a name
+        Args:
+            name: name of buffer ring
+            shape: shape of image
+            dtype: type of image
+            count: number of buffers in the ring, default is self.count
+
+        Returns:
+            numpy array, content is the image of count frames before
+        """
+        count = count or self.count
+        shape = tuple(shape)
+        ring = self.__rings.get(name)
+        if ring is None or len(ring[1]) != count:
+            ring = self.__rings[name] = [0, [None] * count]
+        ring[0] = (ring[0] + 1) % count
+        buffer = ring[1][ring[0]]
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = ring[1][ring[0]] = np.empty(shape, dtype)
+            self.allocations += 1
+            self.allocated_bytes += buffer.nbytes
+        return buffer
+
+    def release(self, name=None):
+        """
+            This function is for free the buffers of a name, or every buffer
+        Args:
+            name: name of buffer ring, None for every ring
+
+        Returns:
+            None
+        """
+        if name is None:
+            self.__rings.clear()
+        else:
+            self.__rings.pop(name, None)
+
+    @property
+    def nbytes(self):
+        """
+            This function is for get memory size of every buffer in the pool
+        Returns:
+            size in bytes
+        """
+        return sum(buffer.nbytes for _, buffers in self.__rings.values() for buffer in buffers if buffer is not None)
@@ -0,0 +1,129 @@
+import numpy as np
+
+FIXED_POINT_TOLERANCE = 1.0 / 32
+
+
+def grid_positions(size, step):
+    """
+        This function is for get the sampled positions of one axis, every step pixel and the last pixel
+    Args:
+        size: number of pixels of the axis
+        step: distance between samples
+
+    Returns:
+        numpy array of positions
+    """
+    positions = np.arange(0, size, step)
+    if positions[-1] != size - 1:
+        positions = np.append(positions, size - 1)
+    return positions
+
+
+def interpolation_weights(size, positions):
+    """
+        This function is for get the index of the sample before every pixel and the linear weight of the next sample
+    Args:
+        size: number of pixels of the axis
+        positions: sampled positions from grid_positions()
+
+    Returns:
+        index, weight
+    """
+    if len(positions) == 1:
+        return np.zeros(size, np.intp), np.zeros(size, np.float32)
+    pixels = np.arange(size)
+    index = np.clip(np.searchsorted(positions, pixels, side="right") - 1, 0, len(positions) - 2)
+    weight = (pixels - positions[index]) / (positions[index + 1] - positions[index])
+    return index, weight.astype(np.float32)
+
+
+class CompactMaps(object):
+    def __init__(self, shape, step, grid_x, grid_y, exception_index, exception_x, exception_y, max_error):
+        """
+        Compact form of maps_x and maps_y: the maps sampled every step pixel, expanded back with bilinear
+        interpolation, and the exact value of every pixel where the interpolation is more than the tolerance away
+        (mostly the edge of the lens circle, where the maps jump to -1).
+        Create it with CompactMaps.from_maps().
+
+        Args:
+            shape: shape of full maps (height, width)
+            step: distance between samples in pixel
+            grid_x: sampled maps_x
+            grid_y: sampled maps_y
+            exception_index: flat index of pixels kept exactly
+            exception_x: maps_x of exception pixels
+            exception_y: maps_y of exception pixels
+            max_error: largest distance between expanded and exact maps, in pixel
+        """
+        super(CompactMaps, self).__init__()
+        self.shape = shape
+        self.step = step
+        self.grid_x = grid_x
+        self.grid_y = grid_y
+        self.exception_index = exception_index
+        self.exception_x = exception_x
+        self.exception_y = exception_y
+        self.max_error = max_error
+
+    @classmethod
+    def from_maps(cls, maps_x, maps_y, step=8, tolerance=FIXED_POINT_TOLERANCE):
+        """
+            This function is for compact maps, the error of the expanded maps is at most tolerance.
+            The default tolerance is the resolution of OpenCV fixed-point maps, so the fixed-point maps built
+            from the expanded maps are the same or one sub-pixel step away from the exact ones
+        Args:
+            maps_x: float maps x
+            maps_y: float maps y
+            step: distance between samples in pixel
+            tolerance: largest error allowed in pixel
+
+        Returns:
+            CompactMaps
+        """
+        height, width = maps_x.shape
+        rows, columns = grid_positions(height, step), grid_positions(width, step)
+        grid_x = np.ascontiguousarray(maps_x[np.ix_(rows, columns)], np.float32)
+        grid_y = np.ascontiguousarray(maps_y[np.ix_(rows, columns)], np.float32)
+        expanded_x, expanded_y = cls.__interpolate(grid_x, grid_y, (height, width), rows, columns)
+        error = np.maximum(np.abs(expanded_x - maps_x), np.abs(expanded_y - maps_y))
+        exception_index = np.flatnonzero(error > tolerance).astype(np.int32)
+        max_error = float(np.max(error, initial=0, where=error <= tolerance))
+        return cls((height, width), step, grid_x, grid_y, exception_index,
+                   np.ascontiguousarray(maps_x.ravel()[exception_index], np.float32),
+                   np.ascontiguousarray(maps_y.ravel()[exception_index], np.float32), max_error)
+
+    @staticmethod
+    def __interpolate(grid_x, grid_y, shape, rows, columns):
+        row_index, row_weight = interpolation_weights(shape[0], rows)
+        column_index, column_weight = interpolation_weights(shape[1], columns)
+        row_weight = row_weight[:, np.newaxis]
+        expanded = []
+        for grid in (grid_x, grid_y):
+            # interpolate along x on the sampled rows, then along y
+            left = grid[:, column_index]
+            lines = left + (grid[:, np.minimum(column_index + 1, grid.shape[1] - 1)] - left) * column_weight
+            top = lines[row_index]
+            expanded.append(top + (lines[np.minimum(row_index + 1, lines.shape[0] - 1)] - top) * row_weight)
+        return expanded
+
+    def expand(self):
+        """
+            This function is for build full maps from compact maps
+        Returns:
+            maps_x, maps_y
+        """
+        rows, columns = grid_positions(self.shape[0], self.step), grid_positions(self.shape[1], self.step)
+        maps_x, maps_y = self.__interpolate(self.grid_x, self.grid_y, self.shape, rows, columns)
+        maps_x.ravel()[self.exception_index] = self.exception_x
+        maps_y.ravel()[self.exception_index] = self.exception_y
+        return maps_x, maps_y
+
+    @property
+    def nbytes(self):
+        """
+            This function is for get memory size of compact maps
+        Returns:
+            size in bytes
+        """
+        return sum(array.nbytes for array in (self.grid_x, self.grid_y, self.exception_index,
+                                              self.exception_x, self.exception_y))
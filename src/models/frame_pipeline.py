@@ -0,0 +1,169 @@
+import queue
+import threading
+
+DROP_POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class FramePipeline(object):
+    def __init__(self, read_frame, process_frame, on_frame_ready=None, on_finished=None,
+                 queue_size=2, drop_policy="block"):
+        """
+        Producer/consumer pipeline for video playback.
+        A capture thread reads frames into a bounded queue and a processing thread takes frames from
+        the queue and process it (remap, overlay). The user interface is notified by on_frame_ready
+        and only paint the latest processed frame.
+
+        Args:
+            read_frame: function without argument return (success, frame, position)
+            process_frame: function with argument (frame, position)
+            on_frame_ready: function called from processing thread after a frame is processed
+            on_finished: function called from processing thread when the source has no more frame
+            queue_size: maximum number of frames waiting for processing
+            drop_policy: "block" wait for free slot, "drop_oldest" replace the oldest queued frame,
+                "drop_newest" discard the frame just captured
+        """
+        super(FramePipeline, self).__init__()
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError("drop_policy must be one of %s" % (DROP_POLICIES,))
+        self.read_frame = read_frame
+        self.process_frame = process_frame
+        self.on_frame_ready = on_frame_ready
+        self.on_finished = on_finished
+        self.drop_policy = drop_policy
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+        self.__running = threading.Event()
+        self.__end_of_stream = object()
+        self.__generation = 0
+        self.__flushed = threading.Event()
+        self.__threads = []
+
+    @property
+    def is_running(self):
+        """
+            This function is for get running state of the pipeline
+        Returns:
+            True if pipeline is running
+        """
+        return self.__running.is_set()
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters of the pipeline
+        Returns:
+            dictionary of captured, processed, dropped and queued frames
+        """
+        return {"captured": self.captured, "processed": self.processed, "dropped": self.dropped,
+                "queued": self.queue.qsize()}
+
+    def start(self):
+        """
+            This function is for start capture thread and processing thread
+        Returns:
+            None
+        """
+        if self.is_running:
+            return
+        self.__running.set()
+        self.__threads = [threading.Thread(target=self.__capture_loop, name="capture", daemon=True),
+                          threading.Thread(target=self.__process_loop, name="processing", daemon=True)]
+        for thread in self.__threads:
+            thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+            This function is for stop the pipeline and wait the threads finish
+        Args:
+            timeout: maximum waiting time for each thread in seconds
+
+        Returns:
+            None
+        """
+        self.__running.clear()
+        for thread in self.__threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self.__threads = []
+        while not self.queue.empty():
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def flush(self):
+        """
+            This function is for drop the frames read before now, after the source moved to another position.
+            Frames in the queue are removed, the frame being read or processed is not shown
+        Returns:
+            None
+        """
+        self.__generation += 1
+        self.__flushed.set()
+        while not self.queue.empty():
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+
+    def __put(self, item):
+        if self.drop_policy == "block" or item is self.__end_of_stream:
+            while self.is_running:
+                try:
+                    self.queue.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        elif self.drop_policy == "drop_newest":
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def __capture_loop(self):
+        while self.is_running:
+            generation = self.__generation
+            success, frame, position = self.read_frame()
+            if generation != self.__generation:
+                continue
+            if not success:
+                self.__put(self.__end_of_stream)
+                # the pipeline finish when the end is processed, unless a flush removed it (seek near the end)
+                while self.is_running and generation == self.__generation:
+                    self.__flushed.wait(0.1)
+                self.__flushed.clear()
+                continue
+            self.captured += 1
+            self.__put((generation, frame, position))
+
+    def __process_loop(self):
+        while self.is_running:
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is self.__end_of_stream:
+                self.__running.clear()
+                if self.on_finished is not None:
+                    self.on_finished()
+                return
+            generation, frame, position = item
+            if generation != self.__generation:
+                continue
+            self.process_frame(frame, position)
+            self.processed += 1
+            if self.on_frame_ready is not None and generation == self.__generation:
+                self.on_frame_ready()
@@ -0,0 +1,194 @@
+import threading
+
+import cv2
+
+
+class FrameRingBuffer(object):
+    def __init__(self, file_path, max_bytes=256 * 1024 * 1024, behind_fraction=0.3):
+        """
+        Bounded buffer of decoded frames around the current position of a paused video.
+        A background thread with its own cv2.VideoCapture decodes the frames before and after the position
+        (read-ahead), so small rewinds and slider nudges are served from memory without seek and decode.
+        The frames farthest from the position are dropped first when the buffer is full.
+        Read-ahead only run while paused, it does not compete with playback.
+
+        Args:
+            file_path: path of video
+            max_bytes: memory budget of the buffer in bytes
+            behind_fraction: part of the buffer used for frames before the position
+        """
+        super(FrameRingBuffer, self).__init__()
+        self.file_path = file_path
+        self.max_bytes = max_bytes
+        self.behind_fraction = behind_fraction
+        self.hits = 0
+        self.misses = 0
+        self.decoded = 0
+        self.__frames = {}
+        self.__frame_bytes = None
+        self.__center = 0
+        self.__lock = threading.Lock()
+        self.__request = threading.Event()
+        self.__running = threading.Event()
+        self.__paused = threading.Event()
+        self.__thread = None
+
+    @property
+    def capacity(self):
+        """
+            This function is for get the number of frames kept in the buffer
+        Returns:
+            number of frames, None before the first frame is decoded
+        """
+        if self.__frame_bytes is None:
+            return None
+        return max(1, self.max_bytes // self.__frame_bytes)
+
+    def __len__(self):
+        return len(self.__frames)
+
+    def __contains__(self, position):
+        return position in self.__frames
+
+    def start(self):
+        """
+            This function is for start read-ahead thread
+        Returns:
+            None
+        """
+        if self.__running.is_set():
+            return
+        self.__running.set()
+        self.__thread = threading.Thread(target=self.__read_ahead_loop, name="frame-read-ahead", daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+            This function is for stop read-ahead thread and free the frames
+        Args:
+            timeout: maximum waiting time in seconds
+
+        Returns:
+            None
+        """
+        self.__running.clear()
+        self.__request.set()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+        self.__thread = None
+        with self.__lock:
+            self.__frames.clear()
+
+    def get(self, position):
+        """
+            This function is for get a decoded frame
+        Args:
+            position: frame position
+
+        Returns:
+            frame, None if not in buffer
+        """
+        with self.__lock:
+            frame = self.__frames.get(position)
+        if frame is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return frame
+
+    def put(self, position, frame):
+        """
+            This function is for keep a decoded frame, the frames farthest from the position are dropped
+        Args:
+            position: frame position
+            frame: decoded frame, it must not be modified after
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__frame_bytes = frame.nbytes
+            self.__frames[position] = frame
+            capacity = self.capacity
+            if len(self.__frames) > capacity:
+                for old in sorted(self.__frames, key=lambda p: abs(p - self.__center))[capacity:]:
+                    del self.__frames[old]
+
+    def read_around(self, position):
+        """
+            This function is for set the current position of the paused video, the read-ahead thread decode
+            the frames around it
+        Args:
+            position: frame position
+
+        Returns:
+            None
+        """
+        self.__center = position
+        self.__paused.set()
+        self.__request.set()
+
+    def pause(self):
+        """
+            This function is for stop read-ahead while the video is playing, the frames are kept
+        Returns:
+            None
+        """
+        self.__paused.clear()
+        self.__request.set()
+
+    def window(self, position):
+        """
+            This function is for get the range of frames wanted around a position
+        Args:
+            position: frame position
+
+        Returns:
+            first position, position after the last
+        """
+        capacity = self.capacity or 1
+        behind = int(capacity * self.behind_fraction)
+        first = max(0, position - behind)
+        return first, first + capacity
+
+    def __interrupted(self):
+        return self.__request.is_set() or not self.__running.is_set() or not self.__paused.is_set()
+
+    def __read_ahead_loop(self):
+        cap = cv2.VideoCapture(self.file_path)
+        try:
+            while self.__running.is_set():
+                self.__request.wait()
+                self.__request.clear()
+                if self.__running.is_set() and self.__paused.is_set():
+                    self.__read_window(cap, self.__center)
+        finally:
+            cap.release()
+
+    def __read_window(self, cap, center):
+        while not self.__interrupted():
+            # the window grow when the size of frame is known after the first decoded frame
+            first, last = self.window(center)
+            with self.__lock:
+                missing = [p for p in range(first, last) if p not in self.__frames]
+            if not missing:
+                return
+            if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) != missing[0]:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, missing[0])
+            success, frame = cap.read()
+            if not success:
+                return
+            self.decoded += 1
+            self.put(missing[0], frame)
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters of the buffer
+        Returns:
+            dictionary of hits, misses, decoded frames, frames and bytes in buffer
+        """
+        with self.__lock:
+            frames = len(self.__frames)
+        return {"hits": self.hits, "misses": self.misses, "decoded": self.decoded, "frames": frames,
+                "bytes": frames * (self.__frame_bytes or 0), "capacity": self.capacity}
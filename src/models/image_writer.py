@@ -0,0 +1,119 @@
+import os
+import queue
+import threading
+import time
+
+import cv2
+
+
+class ImageWriter(object):
+    def __init__(self, workers=2, max_queue=32, idle_timeout=2.0):
+        """
+        Background image encoder. Images are put in a bounded queue and encoded and written by worker threads,
+        so the user interface and the playback are not blocked by cv2.imwrite. The workers are started when
+        images are queued and finish after idle_timeout without image; they are not daemon threads, so the
+        application does not exit before the queued images are written.
+
+        Args:
+            workers: number of worker threads
+            max_queue: maximum number of images waiting for encoding
+            idle_timeout: time in seconds before an idle worker finish
+        """
+        super(ImageWriter, self).__init__()
+        self.workers = max(1, workers)
+        self.idle_timeout = idle_timeout
+        self.queue = queue.Queue(maxsize=max(1, max_queue))
+        self.written = 0
+        self.failed = 0
+        self.dropped = 0
+        self.last_seconds = 0.0
+        self.max_seconds = 0.0
+        self.encode_seconds = 0.0
+        self.__pending = 0
+        self.__threads = []
+        self.__lock = threading.Lock()
+        self.__done = threading.Condition(self.__lock)
+
+    def write(self, file_path, image, params=(), block=True):
+        """
+            This function is for queue an image to write
+        Args:
+            file_path: path of image file, the format is taken from the extension
+            image: image, it must not be modified after, give a copy of reused buffers
+            params: parameters of cv2.imwrite
+            block: wait for a free place when the queue is full, else the image is dropped
+
+        Returns:
+            True if the image is queued
+        """
+        with self.__lock:
+            self.__pending += 1
+        try:
+            self.queue.put((file_path, image, params), block=block)
+        except queue.Full:
+            with self.__lock:
+                self.__pending -= 1
+                self.dropped += 1
+            return False
+        with self.__lock:
+            self.__threads = [thread for thread in self.__threads if thread.is_alive()]
+            if len(self.__threads) < min(self.workers, self.__pending):
+                thread = threading.Thread(target=self.__work, name="image-writer")
+                self.__threads.append(thread)
+                thread.start()
+        return True
+
+    def flush(self, timeout=None):
+        """
+            This function is for wait until every queued image is written
+        Args:
+            timeout: maximum waiting time in seconds
+
+        Returns:
+            True if no image is waiting
+        """
+        with self.__done:
+            return self.__done.wait_for(lambda: self.__pending == 0, timeout)
+
+    def __work(self):
+        while True:
+            try:
+                file_path, image, params = self.queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self.__lock:
+                    if self.queue.empty():
+                        if threading.current_thread() in self.__threads:
+                            self.__threads.remove(threading.current_thread())
+                        return
+                continue
+            start = time.perf_counter()
+            try:
+                directory = os.path.dirname(file_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                success = cv2.imwrite(file_path, image, list(params))
+            except (OSError, cv2.error):
+                success = False
+            seconds = time.perf_counter() - start
+            with self.__done:
+                if success:
+                    self.written += 1
+                else:
+                    self.failed += 1
+                self.last_seconds = seconds
+                self.max_seconds = max(self.max_seconds, seconds)
+                self.encode_seconds += seconds
+                self.__pending -= 1
+                self.__done.notify_all()
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters of the writer
+        Returns:
+            dictionary of queued, written, failed and dropped images and encode time in ms
+        """
+        done = self.written + self.failed
+        return {"queued": self.queue.qsize(), "written": self.written, "failed": self.failed,
+                "dropped": self.dropped, "last_ms": self.last_seconds * 1000, "max_ms": self.max_seconds * 1000,
+                "mean_ms": self.encode_seconds / done * 1000 if done else 0.0}
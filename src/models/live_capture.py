@@ -0,0 +1,120 @@
+import threading
+
+
+class LatestFrameGrabber(object):
+    def __init__(self, cap, capture_lock=None):
+        """
+        Live camera grabber, a dedicated thread keep reading the capture so the internal buffer
+        of cv2.VideoCapture never fill up, and only the newest frame is kept.
+        The render path always take the newest frame, older frame is counted as dropped. A frame is counted as
+        rendered by frame_rendered() when it is processed, a taken frame that is never rendered (dropped by the
+        pipeline queue) is counted as dropped too.
+
+        Args:
+            cap: opened cv2.VideoCapture of USB or streaming camera
+            capture_lock: lock shared with other user of the capture
+        """
+        super(LatestFrameGrabber, self).__init__()
+        self.cap = cap
+        self.capture_lock = capture_lock if capture_lock is not None else threading.Lock()
+        self.grabbed = 0
+        self.taken = 0
+        self.rendered = 0
+        self.dropped = 0
+        self.__frame = None
+        self.__frame_number = 0
+        self.__last_read = 0
+        self.__success = True
+        self.__condition = threading.Condition()
+        self.__running = threading.Event()
+        self.__thread = None
+
+    @property
+    def is_running(self):
+        """
+            This function is for get running state of the grabber
+        Returns:
+            True if grabber is running
+        """
+        return self.__running.is_set()
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters of the grabber
+        Returns:
+            dictionary of grabbed, rendered and dropped frames, dropped include the frames still waiting in
+            the pipeline queue
+        """
+        return {"grabbed": self.grabbed, "rendered": self.rendered,
+                "dropped": self.dropped + max(0, self.taken - self.rendered)}
+
+    def start(self):
+        """
+            This function is for start grabber thread
+        Returns:
+            None
+        """
+        if self.is_running:
+            return
+        self.__running.set()
+        self.__thread = threading.Thread(target=self.__grab_loop, name="live-grabber", daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+            This function is for stop grabber thread
+        Args:
+            timeout: maximum waiting time in seconds
+
+        Returns:
+            None
+        """
+        self.__running.clear()
+        with self.__condition:
+            self.__condition.notify_all()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+        self.__thread = None
+
+    def read(self, timeout=None):
+        """
+            This function is for take the newest frame, wait until a frame newer than the last one is grabbed
+        Args:
+            timeout: maximum waiting time in seconds, None wait until grabber stop
+
+        Returns:
+            success, frame, frame number
+        """
+        with self.__condition:
+            self.__condition.wait_for(lambda: self.__frame_number > self.__last_read or not self.__success
+                                      or not self.is_running, timeout)
+            if self.__frame_number <= self.__last_read:
+                return False, None, self.__last_read
+            self.dropped += self.__frame_number - self.__last_read - 1
+            self.__last_read = self.__frame_number
+            self.taken += 1
+            return True, self.__frame, self.__frame_number
+
+    def frame_rendered(self):
+        """
+            This function is for count a taken frame that is processed, called from processing thread
+        Returns:
+            None
+        """
+        with self.__condition:
+            self.rendered += 1
+
+    def __grab_loop(self):
+        while self.is_running:
+            with self.capture_lock:
+                success, frame = self.cap.read()
+            with self.__condition:
+                if not success:
+                    self.__success = False
+                    self.__running.clear()
+                else:
+                    self.grabbed += 1
+                    self.__frame_number += 1
+                    self.__frame = frame
+                self.__condition.notify_all()
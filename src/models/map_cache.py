@@ -0,0 +1,106 @@
+import collections
+
+
+class MapCache(object):
+    def __init__(self, max_entries=16, max_bytes=512 * 1024 * 1024, on_evict=None):
+        """
+        Bounded LRU cache for remap look up tables (maps_x, maps_y).
+        Every entry is a tuple of numpy arrays, the memory of an entry is the sum of the arrays size,
+        or an object with nbytes like CompactMaps.
+        The least recently used entry is evicted when the number of entries or the total memory
+        go over the limit.
+
+        Args:
+            max_entries: maximum number of maps kept in the cache
+            max_bytes: memory budget of the cache in bytes
+            on_evict: function called with key and maps of every evicted entry, optional
+        """
+        super(MapCache, self).__init__()
+        self.__entries = collections.OrderedDict()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    @staticmethod
+    def entry_size(maps):
+        """
+            This function is for get memory size of cache entry
+        Args:
+            maps: tuple of numpy arrays or object with nbytes
+
+        Returns:
+            size in bytes
+        """
+        if hasattr(maps, "nbytes"):
+            return maps.nbytes
+        return sum(m.nbytes for m in maps if m is not None)
+
+    def get(self, key):
+        """
+            This function is for get maps from cache and mark it as recently used
+        Args:
+            key: hashable key of view parameters
+
+        Returns:
+            tuple of maps or None if not in cache
+        """
+        maps = self.__entries.get(key)
+        if maps is None:
+            self.misses += 1
+            return None
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return maps
+
+    def put(self, key, maps):
+        """
+            This function is for store maps into cache, evict old maps when over the budget
+        Args:
+            key: hashable key of view parameters
+            maps: tuple of numpy arrays
+
+        Returns:
+            None
+        """
+        size = self.entry_size(maps)
+        if size > self.max_bytes:
+            return
+        if key in self.__entries:
+            self.current_bytes -= self.entry_size(self.__entries.pop(key))
+        self.__entries[key] = maps
+        self.current_bytes += size
+        while len(self.__entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            old_key, old_maps = self.__entries.popitem(last=False)
+            self.current_bytes -= self.entry_size(old_maps)
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_maps)
+
+    def clear(self):
+        """
+            This function is for remove all maps from cache, counters are not reset
+        Returns:
+            None
+        """
+        self.__entries.clear()
+        self.current_bytes = 0
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters of the cache
+        Returns:
+            dictionary of hits, misses, evictions, entries and bytes
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self.__entries), "bytes": self.current_bytes}
@@ -0,0 +1,237 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+import zlib
+
+import numpy as np
+
+from .moil_maps import MAPS_VERSION
+
+STORE_VERSION = 2
+TEMPORARY_TIMEOUT = 3600
+MAPS_NAMES = ("maps_x", "maps_y")
+
+
+def default_directory(name="maps"):
+    """
+        This function is for get default directory of a cache of the application, in the user cache directory
+    Args:
+        name: name of the cache
+
+    Returns:
+        path of directory
+    """
+    cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache, "moilapps", name)
+
+
+def parameter_digest(file_path, camera_name=None):
+    """
+        This function is for get the digest of camera parameter file content, a changed file give a new digest
+    Args:
+        file_path: path of camera parameter json file
+        camera_name: name of camera when the file contain several cameras
+
+    Returns:
+        sha256 hex digest
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        digest.update(file.read())
+    digest.update(repr(camera_name).encode())
+    return digest.hexdigest()
+
+
+class MapStore(object):
+    def __init__(self, directory=None, max_bytes=2 * 1024 * 1024 * 1024, verify=True):
+        """
+        Persistent store of remap look up tables on disk, shared by every run and every process of the application.
+        Every entry is a directory of .npy files (float maps_x and maps_y) with a meta.json, keyed by the digest
+        of the camera parameter file, the view parameters and MAPS_VERSION of the maps geometry, so maps built by
+        an older MoilMaps are never served, old entries are removed by the disk budget. The fixed-point maps are
+        not stored, converting the float maps take a few milliseconds and would add 75% to the disk size of an entry.
+        The arrays are opened with memory mapping, so processes using the same maps share the pages.
+        Entries are written in a temporary directory and renamed, a reader never see half written entry.
+        The least recently used entries are removed when the store go over max_bytes.
+
+        Args:
+            directory: directory of the store, default is default_directory()
+            max_bytes: disk budget of the store in bytes
+            verify: check the crc32 of every array when the entry is opened
+        """
+        super(MapStore, self).__init__()
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.verify = verify
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def entry_name(digest, view_key):
+        """
+            This function is for get directory name of an entry
+        Args:
+            digest: digest of camera parameter file from parameter_digest()
+            view_key: view parameters, maps key without camera key
+
+        Returns:
+            name of entry
+        """
+        text = "%d:%d:%s:%r" % (STORE_VERSION, MAPS_VERSION, digest, tuple(view_key))
+        return hashlib.sha256(text.encode()).hexdigest()[:32]
+
+    def __entry_path(self, digest, view_key):
+        return os.path.join(self.directory, self.entry_name(digest, view_key))
+
+    def get(self, digest, view_key):
+        """
+            This function is for open maps of a view from the store with memory mapping. An entry that does
+            not match the camera parameter digest, the view or the checksum is removed
+        Args:
+            digest: digest of camera parameter file
+            view_key: view parameters
+
+        Returns:
+            tuple of read only maps (maps_x, maps_y), None if not in store
+        """
+        path = self.__entry_path(digest, view_key)
+        try:
+            with open(os.path.join(path, "meta.json")) as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        maps = self.__open_entry(path, meta, digest, view_key)
+        if maps is None:
+            self.rejected += 1
+            self.misses += 1
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return maps
+
+    def __open_entry(self, path, meta, digest, view_key):
+        if (meta.get("version") != STORE_VERSION or meta.get("maps_version") != MAPS_VERSION
+                or meta.get("digest") != digest
+                or meta.get("view") != repr(tuple(view_key))):
+            return None
+        maps = []
+        try:
+            for name in MAPS_NAMES:
+                array = np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+                info = meta["arrays"][name]
+                if list(array.shape) != info["shape"] or array.dtype.str != info["dtype"]:
+                    return None
+                if self.verify and zlib.crc32(array) != info["crc32"]:
+                    return None
+                maps.append(array)
+        except (OSError, ValueError, KeyError):
+            return None
+        return tuple(maps)
+
+    def put(self, digest, view_key, maps):
+        """
+            This function is for write maps of a view into the store, then remove old entries over the budget
+        Args:
+            digest: digest of camera parameter file
+            view_key: view parameters
+            maps: tuple starting with float maps_x and maps_y, like Model.convert_maps, other maps are not written
+
+        Returns:
+            None
+        """
+        path = self.__entry_path(digest, view_key)
+        if os.path.isdir(path):
+            return
+        temporary = "%s.tmp-%s" % (path, uuid.uuid4().hex)
+        os.makedirs(temporary)
+        try:
+            arrays = {}
+            for name, array in zip(MAPS_NAMES, maps):
+                array = np.ascontiguousarray(array)
+                np.save(os.path.join(temporary, name + ".npy"), array)
+                arrays[name] = {"shape": list(array.shape), "dtype": array.dtype.str, "crc32": zlib.crc32(array)}
+            with open(os.path.join(temporary, "meta.json"), "w") as file:
+                json.dump({"version": STORE_VERSION, "maps_version": MAPS_VERSION, "digest": digest,
+                           "view": repr(tuple(view_key)), "arrays": arrays, "created": time.time()}, file)
+            os.rename(temporary, path)
+        except OSError:
+            # an other process wrote the same entry first, or the disk is full
+            shutil.rmtree(temporary, ignore_errors=True)
+            return
+        self.evict()
+
+    def entries(self):
+        """
+            This function is for list entries of the store
+        Returns:
+            list of (last used time, size in bytes, path), least recently used first
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if ".tmp-" in name:
+                # left by a process killed while writing
+                try:
+                    if time.time() - os.stat(path).st_mtime > TEMPORARY_TIMEOUT:
+                        shutil.rmtree(path, ignore_errors=True)
+                except OSError:
+                    pass
+                continue
+            if not os.path.isdir(path):
+                continue
+            try:
+                size = sum(entry.stat().st_size for entry in os.scandir(path))
+                entries.append((os.stat(path).st_mtime, size, path))
+            except OSError:
+                continue
+        return sorted(entries)
+
+    def evict(self):
+        """
+            This function is for remove least recently used entries until the store is under max_bytes.
+            Opened memory maps of a removed entry stay valid until they are closed
+        Returns:
+            number of removed entries
+        """
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            removed += 1
+        self.evictions += removed
+        return removed
+
+    def clear(self):
+        """
+            This function is for remove every entry of the store
+        Returns:
+            None
+        """
+        for _, _, path in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters of the store
+        Returns:
+            dictionary of hits, misses, rejected entries, evictions, entries and bytes on disk
+        """
+        entries = self.entries()
+        return {"hits": self.hits, "misses": self.misses, "rejected": self.rejected, "evictions": self.evictions,
+                "entries": len(entries), "bytes": sum(size for _, size, _ in entries)}
@@ -1,9 +1,32 @@
+import collections
 import datetime
+import os
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 
 import cv2
 
 from .moilutils import mutils
 from .data_properties import DataProperties
+from .map_cache import MapCache
+from .buffer_pool import BufferPool
+from .compact_maps import CompactMaps
+from .map_store import MapStore, parameter_digest
+from .frame_pipeline import FramePipeline
+from .image_writer import ImageWriter
+from .live_capture import LatestFrameGrabber
+from .video_index import FrameSeeker
+from .frame_ring import FrameRingBuffer
+from .playback_clock import PlaybackClock
+from .render_governor import RenderGovernor, QUALITY_LEVELS
+from .thumbnail_strip import ThumbnailStrip
+from .video_recorder import VideoRecorder
+from .moil_maps import MoilMaps
+from .overlay import view_outline, create_preview, draw_outline
+from .source_region import sampled_region, rebase_maps, crop_image
+from .view_spec import ViewSpec, build_maps_from_key
 
 
 class Model(object):
@@ -18,8 +41,116 @@ class Model(object):
         self.data_properties = DataProperties()
         self.mutils = mutils
         self.maps_x, self.maps_y = None, None
+        self.maps_fixed = None
+        self.crop_source = True
+        self.crop_max_fraction = 0.5
+        self.source_region = None
+        self.scaled_fixed_maps = {}
+        self.render_governor = RenderGovernor()
+        self.result_quality = 0
+        self.fixed_point_maps = True
+        self.overlay_outline = None
+        self.frame_id = 0
+        self.maps_version = 0
+        self.current_maps_key = None
+        self.result_frame_id = None
+        self.maps_refined = True
+        self.progressive_maps = True
+        self.progressive_scale = 0.25
+        self.on_maps_refined = None
+        self.refine_executor = ThreadPoolExecutor(max_workers=1)
+        self.views = collections.OrderedDict()
+        self.view_results = {}
+        self.view_executor = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1))
+        self.preview_width = 320
+        self.buffers = BufferPool()
+        self.frame_shape = None
+        self.debug_allocations = False
+        self.allocation_stats = {"frame_buffers": 0, "frame_bytes": 0, "frame_peak_bytes": None}
         self.cap = None
         self.moildev = None
+        self.camera_type = None
+        # full resolution maps of the last views, a hit cost only the remap
+        self.map_cache = MapCache(max_entries=8, on_evict=self.compact_evicted_maps)
+        # compact maps of views evicted from map_cache, a hit cost the expand and convert_maps
+        self.compact_map_cache = MapCache(max_entries=128)
+        self.maps_generation = 0
+        try:
+            self.map_store = MapStore()
+        except OSError:
+            self.map_store = None
+        self.camera_digest = None
+        self.camera_parameter_file = None
+        self.compact_maps = True
+        self.compact_step = 8
+        self.capture_lock = threading.Lock()
+        self.render_lock = threading.RLock()
+        self.pipeline = None
+        self.pipeline_queue_size = 2
+        self.pipeline_drop_policy = None
+        self.live_mode = True
+        self.grabber = None
+        self.seeker = None
+        self.frame_ring = None
+        self.frame_ring_mb = 256
+        self.pending_position = None
+        self.thumbnails = None
+        self.thumbnail_count = 64
+        self.fps = 30.0
+        self.pace_playback = True
+        self.playback_clock = None
+        self.next_position = 0
+        self.image_writer = ImageWriter(workers=min(2, os.cpu_count() or 1))
+        self.save_formats = ("jpg",)
+        self.save_original = True
+        self.burst = None
+        self.recorder = None
+        self.on_recording_stopped = None
+        self.record_fourcc = "mp4v"
+        self.record_queue_size = 8
+        self.record_drop_policy = "drop_oldest"
+
+    def connect_to_moildev(self, camera_type):
+        """
+            This function is for connect to moildev with selected camera type
+        Args:
+            camera_type: camera type from camera parameter
+
+        Returns:
+            None
+        """
+        self.camera_type = camera_type
+        self.camera_digest = None
+        self.camera_parameter_file = None
+        self.moildev = mutils.connect_to_moildev(type_camera=camera_type)
+        self.rebuild_views()
+
+    def select_camera(self):
+        """
+            This function is for choose the camera of new media: the camera parameter file from
+            load_camera_parameter is kept, otherwise the camera type is asked by moilutils
+        Returns:
+            None
+        """
+        if self.camera_parameter_file is None:
+            self.connect_to_moildev(mutils.select_type_camera())
+
+    def load_camera_parameter(self, file_path, camera_name=None):
+        """
+            This function is for use the numpy map generator (MoilMaps) with camera parameter json file
+            instead of moildev
+        Args:
+            file_path: path of camera parameter json file
+            camera_name: name of camera when the file contain several cameras
+
+        Returns:
+            None
+        """
+        self.moildev = MoilMaps.from_json(file_path, camera_name)
+        self.camera_type = self.moildev.key
+        self.camera_digest = parameter_digest(file_path, camera_name)
+        self.camera_parameter_file = (file_path, camera_name)
+        self.rebuild_views()
 
     def load_media(self, file_path):
         """
@@ -31,24 +162,20 @@ class Model(object):
         if self.data_properties.source_path.endswith((".png", ".jpg", ".jpeg", ".gif", ".bmg")):
             self.data_properties.properties_video["video"] = False
             # camera_type = mutils.read_camera_type(self.model.source_path)
-            camera_type = None
-            if camera_type is None:
-                camera_type = mutils.select_type_camera()
-                # mutils.write_camera_type(self.model.source_path, camera_type)
-            self.moildev = mutils.connect_to_moildev(type_camera=camera_type)
+            self.select_camera()
             self.set_initial_image(mutils.read_image(self.data_properties.source_path))
         elif self.data_properties.source_path.endswith((".avi", ".mp4")):
             self.data_properties.properties_video["video"] = True
-            camera_type = mutils.select_type_camera()
-            self.moildev = mutils.connect_to_moildev(type_camera=camera_type)
+            self.select_camera()
             self.running_video()
         self.create_maps()
 
-    def load_media_camera(self, camera):
+    def load_media_camera(self, camera, live=None):
         """
             This function is for load camera for streaming video
         Args:
             camera: input address camera
+            live: use latest frame grabber for the camera, default is self.live_mode
         Returns:
             None
         """
@@ -57,28 +184,147 @@ class Model(object):
         else:
             self.data_properties.source_path = camera
         self.data_properties.properties_video["video"] = True
-        camera_type = mutils.select_type_camera()
-        self.moildev = mutils.connect_to_moildev(type_camera=camera_type)
+        self.select_camera()
         self.running_video()
+        if live is None:
+            live = self.live_mode
+        if live:
+            self.grabber = LatestFrameGrabber(self.cap, self.capture_lock)
+            self.grabber.start()
         self.create_maps()
 
+    @property
+    def live_stats(self):
+        """
+            This function is for get grabbed, rendered and dropped frames counter of live camera
+        Returns:
+            dictionary of live camera counters, None if live mode is not running
+        """
+        if self.grabber is None:
+            return None
+        return self.grabber.stats
+
     def running_video(self):
         """
             read camera address
         Returns:
             None
         """
+        self.stop_pipeline()
+        self.stop_recording()
+        if self.grabber is not None:
+            self.grabber.stop()
+            self.grabber = None
+        if self.frame_ring is not None:
+            self.frame_ring.stop()
+            self.frame_ring = None
+        if self.thumbnails is not None:
+            self.thumbnails.stop()
+            self.thumbnails = None
+        self.pending_position = None
         self.cap = cv2.VideoCapture(self.data_properties.source_path)
+        # read once, video_duration is called for every frame
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.render_governor.reset(self.fps)
+        self.data_properties.properties_video["frame_count"] = float(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        source_path = self.data_properties.source_path
+        self.seeker = None
+        self.playback_clock = None
+        if isinstance(source_path, str) and os.path.isfile(source_path):
+            self.seeker = FrameSeeker(self.cap, source_path, self.capture_lock)
+            self.playback_clock = PlaybackClock(self.fps)
+            if self.frame_ring_mb:
+                self.frame_ring = FrameRingBuffer(source_path, self.frame_ring_mb * 1024 * 1024)
+                self.frame_ring.start()
+            if self.thumbnail_count:
+                self.thumbnails = ThumbnailStrip(source_path, self.thumbnail_count, seeker=self.seeker)
+                self.thumbnails.start()
         self.next_frame()
+        self.keep_paused_frame()
 
-    def next_frame(self):
+    def read_frame(self):
         """
-            This function is for do lopping video for user interface
+            This function is for read the next frame from video or camera
         Returns:
-            None
+            success, frame, position of frame
         """
-        success, self.data_properties.image_original = self.cap.read()
+        if self.grabber is not None:
+            return self.grabber.read()
+        if self.pending_position is not None:
+            # the last frame came from the frame ring buffer, or a seek during playback: the capture is not there yet
+            position, self.pending_position = self.pending_position, None
+            if self.pipeline is None and self.frame_ring is not None:
+                # paused: the next frame is served by the frame ring buffer too, the capture is not moved
+                frame = self.frame_ring.get(position)
+                if frame is not None:
+                    self.pending_position = position + 1
+                    self.frame_ring.read_around(position)
+                    return True, frame, position + 1
+            self.seek_capture(position)
+            self.next_position = position
+            if self.playback_clock is not None and self.playback_clock.is_running:
+                # playback continue from the new position, the frames between are not late
+                self.playback_clock.move_to(position)
+        clock = self.playback_clock
+        if clock is not None and clock.is_running:
+            self.pace_frame(clock)
+        with self.capture_lock:
+            if self.frame_shape is None:
+                success, frame = self.cap.read()
+            else:
+                # frames waiting in the pipeline queue, in process and shown must not be overwritten
+                buffer = self.buffers.take("frame", self.frame_shape, count=self.pipeline_queue_size + 3)
+                success, frame = self.cap.read(buffer)
+            position = self.cap.get(cv2.CAP_PROP_POS_FRAMES) if success else 0
         if success:
+            self.frame_shape = frame.shape
+            self.next_position = int(position)
+        return success, frame, position
+
+    def pace_frame(self, clock):
+        """
+            This function is for keep playback at the frame rate of the video: wait until the next frame is due,
+            or skip the frames that are already late when the render is slower than the frame rate
+        Args:
+            clock: running playback clock
+
+        Returns:
+            None
+        """
+        skip = clock.wait_for(self.next_position)
+        if not skip:
+            return
+        if skip > self.fps:
+            # more than a second late, a seek is cheaper than decoding every late frame
+            self.seek_capture(self.next_position + skip)
+            dropped = skip
+        else:
+            dropped = 0
+            with self.capture_lock:
+                while dropped < skip and self.cap.grab():
+                    dropped += 1
+        self.next_position += dropped
+        clock.frames_dropped(dropped)
+
+    def process_frame(self, frame, position):
+        """
+            This function is for generate image result from a frame base on mode view
+        Args:
+            frame: frame from video or camera
+            position: position of frame in video
+
+        Returns:
+            None
+        """
+        with self.render_lock:
+            allocations, allocated_bytes = self.buffers.allocations, self.buffers.allocated_bytes
+            if self.debug_allocations:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                tracemalloc.reset_peak()
+                traced = tracemalloc.get_traced_memory()[0]
+            self.data_properties.image_original = frame
+            self.frame_id += 1
             self.data_properties.properties_video["video"] = True
             if self.data_properties.mode_view == "Fisheye":
                 self.data_properties.image_result = self.data_properties.image_original
@@ -86,17 +332,95 @@ class Model(object):
                 self.data_properties.image_result = self.generate_result_image()
             elif self.data_properties.mode_view == "Panorama":
                 self.data_properties.image_result = self.generate_result_image()
-            self.video_duration()
+            self.render_views()
+            self.video_duration(position)
+            if self.burst is not None:
+                self.capture_burst_frame(position)
+            recorder = self.recorder
+            if recorder is not None:
+                self.record_frame(recorder, position)
+            if self.playback_clock is not None and self.playback_clock.is_running:
+                self.playback_clock.frame_presented()
+            grabber = self.grabber
+            if grabber is not None:
+                grabber.frame_rendered()
+            self.allocation_stats["frame_buffers"] = self.buffers.allocations - allocations
+            self.allocation_stats["frame_bytes"] = self.buffers.allocated_bytes - allocated_bytes
+            if self.debug_allocations:
+                self.allocation_stats["frame_peak_bytes"] = tracemalloc.get_traced_memory()[1] - traced
+
+    def next_frame(self):
+        """
+            This function is for do lopping video for user interface
+        Returns:
+            None
+        """
+        success, frame, position = self.read_frame()
+        if success:
+            self.process_frame(frame, position)
 
-    def video_duration(self):
+    def start_pipeline(self, on_frame_ready=None, on_finished=None):
+        """
+            This function is for start playback in capture and processing thread, outside user interface thread
+        Args:
+            on_frame_ready: function called after every processed frame
+            on_finished: function called when video reach the end
+
+        Returns:
+            None
+        """
+        self.stop_pipeline()
+        if self.frame_ring is not None:
+            self.frame_ring.pause()
+        if self.thumbnails is not None:
+            self.thumbnails.pause()
+        drop_policy = self.pipeline_drop_policy
+        if drop_policy is None:
+            drop_policy = "block" if isinstance(self.data_properties.source_path, str) and \
+                self.data_properties.source_path.endswith((".avi", ".mp4")) else "drop_oldest"
+        # live camera already keep the newest frame only, a deeper queue only add latency
+        queue_size = 1 if self.grabber is not None else self.pipeline_queue_size
+        if self.playback_clock is not None and self.pace_playback:
+            self.next_position = self.pending_position if self.pending_position is not None else \
+                int(self.data_properties.properties_video["pos_frame"])
+            self.playback_clock.start(self.next_position)
+        self.pipeline = FramePipeline(self.read_frame, self.process_frame, on_frame_ready, on_finished,
+                                      queue_size=queue_size, drop_policy=drop_policy)
+        self.pipeline.start()
+
+    def stop_pipeline(self):
+        """
+            This function is for stop playback thread
+        Returns:
+            None
+        """
+        if self.playback_clock is not None:
+            self.playback_clock.stop()
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+            if self.thumbnails is not None:
+                self.thumbnails.resume()
+            self.keep_paused_frame()
+            with self.render_lock:
+                if self.result_quality and self.data_properties.mode_view != "Fisheye" and self.maps_x is not None:
+                    # the paused frame is shown in full quality
+                    self.data_properties.image_result = self.generate_result_image()
+
+    def video_duration(self, position=None):
         """
             This function is for get time of video
+        Args:
+            position: position of current frame, read from video if None
+
         Returns:
             None
         """
-        fps = self.cap.get(cv2.CAP_PROP_FPS)
-        self.data_properties.properties_video["pos_frame"] = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
-        self.data_properties.properties_video["frame_count"] = float(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if position is None:
+            with self.capture_lock:
+                position = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
+        fps = self.fps
+        self.data_properties.properties_video["pos_frame"] = position
         duration_sec = int(self.data_properties.properties_video["frame_count"] / fps)
 
         self.data_properties.properties_video["total_minute"] = int(duration_sec // 60)
@@ -116,44 +440,535 @@ class Model(object):
         self.data_properties.properties_video["total_minute"] = 0
         self.data_properties.properties_video["total_second"] = 0
 
-    def create_maps(self):
+    def maps_key(self):
         """
-            This function is for create image maps_x and maps_y base on mode view
+            This function is for get the key of current maps in map cache
+        Returns:
+            tuple of camera type and view parameters, None for fisheye view
+        """
+        if self.data_properties.mode_view not in ("Anypoint", "Panorama"):
+            return None
+        return ViewSpec.from_properties(self.data_properties.mode_view, self.data_properties.properties_anypoint,
+                                        self.data_properties.properties_panorama).key(self.camera_type)
+
+    def build_maps(self, key, scale=1.0):
+        """
+            This function is for build maps_x and maps_y from moildev for a maps key
+        Args:
+            key: maps key from maps_key()
+            scale: scale of maps size, only supported by MoilMaps, the maps are upsampled to full size
+
+        Returns:
+            maps_x, maps_y
+        """
+        maps = build_maps_from_key(self.moildev, key, scale)
+        if scale != 1.0:
+            size = self.moildev.maps_size()
+            maps = tuple(cv2.resize(m, size, interpolation=cv2.INTER_LINEAR) for m in maps)
+        return maps
+
+    def create_maps(self, progressive=None):
+        """
+            This function is for create image maps_x and maps_y base on mode view,
+            maps already created before are taken from map cache.
+            In progressive mode a new view first get low resolution maps (progressive_scale) upsampled to full size,
+            the full resolution maps are built in background and swapped in when ready
+        Args:
+            progressive: use progressive mode, default is self.progressive_maps
+
         Returns:
             None
         """
-        if self.data_properties.mode_view == "Fisheye":
-            self.data_properties.image_result = self.data_properties.image_original
-        elif self.data_properties.mode_view == "Anypoint":
-            if self.data_properties.properties_anypoint["mode"] == 1:
-                self.maps_x, self.maps_y = self.moildev.maps_anypoint(
-                    self.data_properties.properties_anypoint["alpha"],
-                    self.data_properties.properties_anypoint["beta"],
-                    self.data_properties.properties_anypoint["zoom"],
-                    self.data_properties.properties_anypoint["mode"])
-            else:
-                self.maps_x, self.maps_y = self.moildev.maps_anypoint_car(
-                    self.data_properties.properties_anypoint["alpha"],
-                    self.data_properties.properties_anypoint["beta"],
-                    self.data_properties.properties_anypoint["roll"],
-                    self.data_properties.properties_anypoint["zoom"])
-            self.data_properties.image_result = self.generate_result_image()
+        if progressive is None:
+            progressive = self.progressive_maps
+        progressive = progressive and isinstance(self.moildev, MoilMaps)
+        with self.render_lock:
+            if self.data_properties.mode_view == "Fisheye":
+                self.data_properties.image_result = self.data_properties.image_original
+                self.result_frame_id = None
+            elif self.data_properties.mode_view in ("Anypoint", "Panorama"):
+                key = self.maps_key()
+                if key == self.current_maps_key and self.maps_x is not None and (self.maps_refined or progressive):
+                    # parameters did not change, only render the result when the frame changed
+                    if self.result_frame_id != self.frame_id:
+                        self.data_properties.image_result = self.generate_result_image()
+                    return
+                maps = self.cached_maps(key)
+                if maps is None:
+                    maps = self.load_stored_maps(key)
+                    if maps is not None:
+                        self.cache_maps(key, maps)
+                refined = True
+                if maps is None:
+                    if progressive:
+                        maps = self.convert_maps(*self.build_maps(key, self.progressive_scale))
+                        refined = False
+                    else:
+                        maps = self.convert_maps(*self.build_maps(key))
+                        self.cache_maps(key, maps)
+                        self.store_maps(key, maps)
+                self.set_maps(key, maps, refined)
+                if not refined:
+                    self.refine_executor.submit(self.refine_maps, key)
+                self.data_properties.image_result = self.generate_result_image()
+
+    def create_maps_batch(self, parameters, mode=None, max_batch_bytes=512 * 1024 * 1024):
+        """
+            This function is for build maps of many anypoint views at once and keep them in map cache,
+            to pre-warm presets or a tour of views. Views already in cache are not built again
+        Args:
+            parameters: sequence of (alpha, beta, roll, zoom)
+            mode: anypoint mode 1 or 2, default is current anypoint mode
+            max_batch_bytes: memory budget of one batch of MoilMaps.maps_anypoint_batch
+
+        Returns:
+            list of maps key in the order of parameters
+        """
+        if mode is None:
+            mode = self.data_properties.properties_anypoint["mode"]
+        keys = [ViewSpec("Anypoint", alpha=alpha, beta=beta, roll=roll, zoom=zoom, mode=mode).key(self.camera_type)
+                for alpha, beta, roll, zoom in parameters]
+        missing = [(key, parameter) for key, parameter in zip(keys, parameters)
+                   if key not in self.map_cache and key not in self.compact_map_cache]
+        if not missing:
+            return keys
+        stored = [(key, self.load_stored_maps(key)) for key, _ in missing]
+        with self.render_lock:
+            for key, maps in stored:
+                if maps is not None:
+                    self.cache_batch_maps(key, maps)
+        missing = [(key, parameter) for (key, parameter), (_, maps) in zip(missing, stored) if maps is None]
+        if not missing:
+            return keys
+        if isinstance(self.moildev, MoilMaps):
+            maps = self.moildev.maps_anypoint_batch([parameter for _, parameter in missing], mode,
+                                                    max_batch_bytes=max_batch_bytes)
+        else:
+            maps = [self.build_maps(key) for key, _ in missing]
+        with self.render_lock:
+            for (key, _), (maps_x, maps_y) in zip(missing, maps):
+                maps = self.convert_maps(maps_x, maps_y)
+                self.cache_batch_maps(key, maps)
+                self.store_maps(key, maps)
+        return keys
+
+    def compact(self, maps):
+        """
+            This function is for create compact maps of full maps
+        Args:
+            maps: maps from convert_maps
+
+        Returns:
+            CompactMaps
+        """
+        return CompactMaps.from_maps(maps[0], maps[1], self.compact_step)
+
+    def cache_batch_maps(self, key, maps):
+        """
+            This function is for put maps of create_maps_batch in cache. Many views at once would only pass
+            through the small full resolution cache, with compact_maps they are compacted at once
+        Args:
+            key: maps key
+            maps: maps from convert_maps
+
+        Returns:
+            None
+        """
+        if self.compact_maps:
+            self.compact_map_cache.put(key, self.compact(maps))
+        else:
+            self.map_cache.put(key, maps)
+
+    def cache_maps(self, key, maps):
+        """
+            This function is for put maps in map cache. The full maps stay in map cache for the last views,
+            with compact_maps the maps evicted from it are kept as CompactMaps in compact_map_cache
+        Args:
+            key: maps key
+            maps: maps from convert_maps
+
+        Returns:
+            None
+        """
+        with self.render_lock:
+            self.map_cache.put(key, maps)
+
+    def compact_evicted_maps(self, key, maps):
+        """
+            This function is for compact maps evicted from map cache in background, called by map cache
+            with the render lock held
+        Args:
+            key: maps key
+            maps: maps from convert_maps
+
+        Returns:
+            None
+        """
+        if self.compact_maps and key not in self.compact_map_cache:
+            self.refine_executor.submit(self.compact_cached_maps, key, maps, self.maps_generation)
+
+    def compact_cached_maps(self, key, maps, generation):
+        """
+            This function is for put compact maps of evicted maps in compact map cache, run in background
+        Args:
+            key: maps key
+            maps: maps from convert_maps
+            generation: maps_generation when the maps were evicted, maps of dropped cache are not kept
+
+        Returns:
+            None
+        """
+        compact = self.compact(maps)
+        with self.render_lock:
+            if generation == self.maps_generation:
+                self.compact_map_cache.put(key, compact)
+
+    def cached_maps(self, key):
+        """
+            This function is for get maps from map cache, compact maps are expanded to full maps and put back
+            in map cache
+        Args:
+            key: maps key
+
+        Returns:
+            maps like convert_maps, None if not in cache
+        """
+        with self.render_lock:
+            maps = self.map_cache.get(key)
+            if maps is not None:
+                return maps
+            compact = self.compact_map_cache.get(key)
+        if compact is None:
+            return None
+        maps = self.convert_maps(*compact.expand())
+        self.cache_maps(key, maps)
+        return maps
+
+    def load_stored_maps(self, key):
+        """
+            This function is for open maps from the map store on disk, only when the maps were built from
+            a camera parameter file (load_camera_parameter). The fixed-point maps are converted again
+        Args:
+            key: maps key
+
+        Returns:
+            maps like convert_maps, float maps memory mapped, None if not in store
+        """
+        if self.map_store is None or self.camera_digest is None:
+            return None
+        maps = self.map_store.get(self.camera_digest, key[1:])
+        return self.convert_maps(*maps) if maps is not None else None
+
+    def store_maps(self, key, maps):
+        """
+            This function is for write maps into the map store in background, the render is not blocked
+        Args:
+            key: maps key
+            maps: maps from convert_maps
+
+        Returns:
+            None
+        """
+        if self.map_store is not None and self.camera_digest is not None:
+            self.refine_executor.submit(self.map_store.put, self.camera_digest, key[1:], maps)
+
+    def full_maps(self, key):
+        """
+            This function is for get full resolution maps of a key from map store, or build and store it
+        Args:
+            key: maps key
+
+        Returns:
+            maps like convert_maps
+        """
+        maps = self.load_stored_maps(key)
+        if maps is None:
+            maps = self.convert_maps(*self.build_maps(key))
+            self.store_maps(key, maps)
+        return maps
+
+    def set_maps(self, key, maps, refined=True):
+        """
+            This function is for set current maps
+        Args:
+            key: maps key
+            maps: maps from convert_maps
+            refined: False for low resolution maps of progressive mode
+
+        Returns:
+            None
+        """
+        with self.render_lock:
+            self.maps_x, self.maps_y = maps[:2]
+            self.source_region, self.maps_fixed = self.crop_maps(maps)
+            self.scaled_fixed_maps = {}
+            self.overlay_outline = view_outline(self.maps_x, self.maps_y)
+            self.maps_version += 1
+            self.current_maps_key = key
+            self.maps_refined = refined
+
+    def crop_maps(self, maps):
+        """
+            This function is for find the region of original image read by the maps, when the region is small
+            (a zoomed anypoint view) the fixed-point maps are moved to the region, so the frame path only give
+            that region to remap
+        Args:
+            maps: maps from convert_maps
+
+        Returns:
+            region (x, y, width, height) or None for the whole image, fixed-point maps
+        """
+        if not self.crop_source:
+            return None, maps[2:]
+        height, width = maps[0].shape[:2]
+        region = sampled_region(maps[0], maps[1], (width, height))
+        if region is None or region[2] * region[3] > self.crop_max_fraction * width * height:
+            return None, maps[2:]
+        return region, (rebase_maps(maps[2], region), maps[3])
+
+    def refine_maps(self, key):
+        """
+            This function is for build full resolution maps in background thread and swap it in when the view
+            is still the same, maps of a view that is not current any more are not built
+        Args:
+            key: maps key
+
+        Returns:
+            None
+        """
+        if key != self.current_maps_key:
+            return
+        maps = self.convert_maps(*self.build_maps(key))
+        self.store_maps(key, maps)
+        self.cache_maps(key, maps)
+        with self.render_lock:
+            if key != self.current_maps_key or self.maps_refined:
+                return
+            self.set_maps(key, maps)
+            if self.data_properties.image_original is not None:
+                self.data_properties.image_result = self.generate_result_image()
+        if self.on_maps_refined is not None:
+            self.on_maps_refined()
+
+    def view_maps(self, view):
+        """
+            This function is for get fixed-point maps of a view from map cache, the maps are built if not in cache
+        Args:
+            view: ViewSpec
+
+        Returns:
+            fixed-point coordinate maps, fixed-point interpolation maps, source region
+        """
+        key = view.key(self.camera_type)
+        with self.render_lock:
+            maps = self.cached_maps(key)
+            if maps is None:
+                maps = self.full_maps(key)
+                self.cache_maps(key, maps)
+        region, maps = self.crop_maps(maps)
+        return maps + (region,)
+
+    def add_view(self, view, name=None):
+        """
+            This function is for add a named view rendered from every frame together with the main view
+        Args:
+            view: ViewSpec or view text like "front=anypoint:75,0,2"
+            name: name of view, default is the name of ViewSpec
 
-        elif self.data_properties.mode_view == "Panorama":
-            self.maps_x, self.maps_y = self.moildev.maps_panorama(
-                self.data_properties.properties_panorama["alpha_min"],
-                self.data_properties.properties_panorama["alpha_max"])
-            self.data_properties.image_result = self.generate_result_image()
+        Returns:
+            name of view
+        """
+        if not isinstance(view, ViewSpec):
+            view = ViewSpec.parse(view)
+        name = name or view.name
+        maps = self.view_maps(view) if self.moildev is not None else None
+        with self.render_lock:
+            self.views[name] = (view, maps)
+            if maps is not None and self.data_properties.image_original is not None:
+                self.view_results[name] = cv2.remap(crop_image(self.data_properties.image_original, maps[2]),
+                                                    maps[0], maps[1], cv2.INTER_LINEAR)
+        return name
 
-    def generate_result_image(self):
+    def remove_view(self, name):
         """
-            This function is for generate image base map_x, map_y
+            This function is for remove a named view
+        Args:
+            name: name of view
+
         Returns:
             None
         """
-        self.data_properties.image_drawing = mutils.draw_polygon(self.data_properties.image_original.copy(), self.maps_x, self.maps_y)
+        with self.render_lock:
+            self.views.pop(name, None)
+            self.view_results.pop(name, None)
+
+    def rebuild_views(self):
+        """
+            This function is for build maps of every named view again, after the camera changed
+        Returns:
+            None
+        """
+        for name, (view, _) in list(self.views.items()):
+            self.views[name] = (view, self.view_maps(view))
+
+    def render_views(self):
+        """
+            This function is for render every named view from the current original image, the views are
+            remapped in parallel by a thread pool
+        Returns:
+            dictionary of view name and image result
+        """
+        image = self.data_properties.image_original
+        views = [(name, maps) for name, (_, maps) in self.views.items() if maps is not None]
+        if image is None or not views:
+            return self.view_results
+        futures = [(name, self.view_executor.submit(
+            cv2.remap, crop_image(image, maps[2]), maps[0], maps[1], cv2.INTER_LINEAR,
+            dst=self.buffers.take(("view", name), maps[0].shape[:2] + image.shape[2:], image.dtype)))
+            for name, maps in views]
+        self.view_results = {name: future.result() for name, future in futures}
+        return self.view_results
+
+    def get_view_result(self, name):
+        """
+            This function is for get image result of a named view
+        Args:
+            name: name of view
+
+        Returns:
+            image result, None if the view is not rendered yet
+        """
+        return self.view_results.get(name)
+
+    def invalidate_maps(self):
+        """
+            This function is for drop all cached maps, the next create_maps rebuild the maps
+        Returns:
+            None
+        """
+        with self.render_lock:
+            self.map_cache.clear()
+            self.compact_map_cache.clear()
+            self.maps_generation += 1
+            self.current_maps_key = None
+            self.rebuild_views()
+
+    @staticmethod
+    def convert_maps(maps_x, maps_y):
+        """
+            This function is for convert float maps into OpenCV fixed-point maps (CV_16SC2 and CV_16UC1).
+            The fixed-point maps use less memory and make per frame remap faster, the float maps are kept
+            for drawing and for high quality still image
+        Args:
+            maps_x: float maps x
+            maps_y: float maps y
+
+        Returns:
+            maps_x, maps_y, fixed-point coordinate maps, fixed-point interpolation maps
+        """
+        maps_x = maps_x.astype("float32", copy=False)
+        maps_y = maps_y.astype("float32", copy=False)
+        fixed_xy, fixed_interpolation = cv2.convertMaps(maps_x, maps_y, cv2.CV_16SC2)
+        return maps_x, maps_y, fixed_xy, fixed_interpolation
+
+    @property
+    def map_cache_stats(self):
+        """
+            This function is for get hit, miss and eviction counters of map cache
+        Returns:
+            dictionary of map cache counters, counters of compact map cache in "compact"
+        """
+        return dict(self.map_cache.stats, compact=self.compact_map_cache.stats)
+
+    @property
+    def render_allocations(self):
+        """
+            This function is for get allocation counters of the last rendered frame, for debugging.
+            frame_buffers and frame_bytes count buffers allocated by the render loop, zero while playing
+            without change of geometry. frame_peak_bytes is the peak of memory allocated during the frame,
+            measured by tracemalloc only when debug_allocations is True
+        Returns:
+            dictionary of allocation counters and total size of preallocated buffers
+        """
+        return dict(self.allocation_stats, buffers_bytes=self.buffers.nbytes)
+
+    @property
+    def map_store_stats(self):
+        """
+            This function is for get counters of map store on disk
+        Returns:
+            dictionary of map store counters, None without map store
+        """
+        return self.map_store.stats if self.map_store is not None else None
+
+    def generate_result_image(self, high_quality=False):
+        """
+            This function is for generate image base map_x, map_y. During playback the render governor choose
+            the quality (interpolation, output size) from the render time of the last frames
+        Args:
+            high_quality: use float maps instead of fixed-point maps and never a lower quality, for saving
+                still image
+
+        Returns:
+            image result
+        """
+        self.result_frame_id = self.frame_id
+        self.data_properties.image_drawing = self.generate_drawing_image()
+        self.result_quality = 0
+        if self.fixed_point_maps and self.maps_fixed and not high_quality:
+            image = self.data_properties.image_original
+            governed = self.pipeline is not None and self.render_governor.enabled
+            _, scale, interpolation = self.render_governor.quality if governed else QUALITY_LEVELS[0]
+            start = time.perf_counter()
+            if scale == 1.0:
+                name, maps = "result", self.maps_fixed
+            else:
+                name, maps = ("result", scale), self.scaled_maps(scale)
+            result = self.buffers.take(name, maps[0].shape[:2] + image.shape[2:], image.dtype)
+            # nearest interpolation only use the integer coordinates
+            result = cv2.remap(crop_image(image, self.source_region), maps[0],
+                               None if interpolation == cv2.INTER_NEAREST else maps[1], interpolation, dst=result)
+            if governed:
+                self.result_quality = self.render_governor.level
+                self.render_governor.record(time.perf_counter() - start)
+            return result
         return mutils.remap_image(self.data_properties.image_original, self.maps_x, self.maps_y)
 
+    def scaled_maps(self, scale):
+        """
+            This function is for get fixed-point maps of the current view for a smaller output size, they are
+            made once per view from maps_x and maps_y
+        Args:
+            scale: scale of output size
+
+        Returns:
+            fixed-point coordinate maps, fixed-point interpolation maps, in the source region like maps_fixed
+        """
+        maps = self.scaled_fixed_maps.get(scale)
+        if maps is None:
+            height, width = self.maps_x.shape[:2]
+            size = (max(1, round(width * scale)), max(1, round(height * scale)))
+            # nearest, an average would mix the coordinates of the lens border with -1 outside the lens
+            maps = cv2.convertMaps(cv2.resize(self.maps_x, size, interpolation=cv2.INTER_NEAREST),
+                                   cv2.resize(self.maps_y, size, interpolation=cv2.INTER_NEAREST), cv2.CV_16SC2)
+            if self.source_region is not None:
+                maps = (rebase_maps(maps[0], self.source_region), maps[1])
+            self.scaled_fixed_maps[scale] = maps
+        return maps
+
+    def generate_drawing_image(self):
+        """
+            This function is for draw region of view on the preview of original image, the preview is drawn
+            at preview_width so the full resolution image is never copied
+        Returns:
+            image drawing
+        """
+        image = self.data_properties.image_original
+        height = max(1, round(image.shape[0] * self.preview_width / image.shape[1]))
+        preview = self.buffers.take("preview", (height, self.preview_width) + image.shape[2:], image.dtype)
+        preview, scale = create_preview(image, self.preview_width, preview)
+        return draw_outline(preview, self.overlay_outline, scale)
+
     def set_initial_image(self, image):
         """
         This function is will be used to set original image (get image result) in the user interface frame
@@ -166,6 +981,18 @@ class Model(object):
         self.data_properties.image_original = image
         self.data_properties.image_result = image
         self.data_properties.image_drawing = image
+        self.frame_id += 1
+        self.render_views()
+
+    def display_key(self):
+        """
+            This function is for get identity of the current frame and view, used to skip repaint of unchanged image
+        Returns:
+            tuple of frame id, mode view, maps version and quality of result
+        """
+        if self.data_properties.mode_view == "Fisheye":
+            return self.frame_id, "Fisheye"
+        return self.frame_id, self.data_properties.mode_view, self.maps_version, self.result_quality
 
     def reset_anypoint_properties(self):
         """
@@ -189,17 +1016,163 @@ class Model(object):
 
     def save_image(self, path):
         """
-            this function is for save image
+            this function is for save image, the result and the original image are written in background
+            by the image writer, in every format of save_formats
         Args:
             path: path image save
+        Returns:
+            list of image file paths
+        """
+        x = datetime.datetime.now()
+        time_name = x.strftime("%Y_%m_%d_%H_%M_%S")
+        if self.data_properties.image_original is None:
+            return []
+        with self.render_lock:
+            if not self.maps_refined:
+                self.create_maps(progressive=False)
+            if self.data_properties.mode_view != "Fisheye" and self.maps_x is not None:
+                self.data_properties.image_result = self.generate_result_image(high_quality=True)
+            return self.queue_images(path, "_" + time_name, block=True)
+
+    def queue_images(self, path, suffix, block):
+        """
+            This function is for give copies of the current result and original image to the image writer,
+            the images are in buffers reused by the next frames
+        Args:
+            path: directory of images
+            suffix: end of file names, before the extension
+            block: wait when the queue of image writer is full, else the images are dropped
+
+        Returns:
+            list of queued image file paths
+        """
+        images = [("image_result", self.data_properties.image_result)]
+        if self.save_original:
+            images.append(("image_original", self.data_properties.image_original))
+        files = []
+        for name, image in images:
+            if image is None:
+                continue
+            image = image.copy()
+            for image_format in self.save_formats:
+                file_path = os.path.join(path, "%s%s.%s" % (name, suffix, image_format))
+                if self.image_writer.write(file_path, image, block=block):
+                    files.append(file_path)
+        return files
+
+    def start_burst(self, path, count=None, every=1):
+        """
+            This function is for save the frames of playback, every processed frame is queued to the image
+            writer without waiting, frames are dropped when the writer is behind
+        Args:
+            path: directory of images
+            count: number of frames to save, None until stop_burst
+            every: save one frame every this number of processed frames
+
+        Returns:
+            None
+        """
+        self.burst = {"path": path, "remaining": count, "every": max(1, every), "frames": 0,
+                      "time": datetime.datetime.now().strftime("%Y_%m_%d_%H_%M_%S")}
+
+    def stop_burst(self):
+        """
+            This function is for stop saving the frames of playback
+        Returns:
+            None
+        """
+        self.burst = None
+
+    def capture_burst_frame(self, position):
+        """
+            This function is for queue the processed frame of a burst, called from process_frame
+        Args:
+            position: position of the frame in video
+
         Returns:
             None
         """
+        burst = self.burst
+        burst["frames"] += 1
+        if (burst["frames"] - 1) % burst["every"]:
+            return
+        # frame number in a video file, a camera has no position
+        number = int(position) - 1 if self.seeker is not None else self.frame_id
+        self.queue_images(burst["path"], "_%s_%06d" % (burst["time"], number), block=False)
+        if burst["remaining"] is not None:
+            burst["remaining"] -= 1
+            if burst["remaining"] <= 0:
+                self.burst = None
+
+    def start_recording(self, path, views=()):
+        """
+            This function is for record the rendered result of every processed frame into a video, the frames
+            are encoded in background. Named views can be recorded together, every view in its own video
+        Args:
+            path: directory of videos
+            views: names of views from add_view to record with the result
+
+        Returns:
+            list of video file paths
+        """
+        self.stop_recording()
         x = datetime.datetime.now()
-        time = x.strftime("%Y_%m_%d_%H_%M_%S")
-        if self.data_properties.image_original is not None:
-            cv2.imwrite(path + "/image_result_" + time + ".jpg", self.data_properties.image_result)
-            cv2.imwrite(path + "/image_result_" + time + ".jpg", self.data_properties.image_original)
+        time_name = x.strftime("%Y_%m_%d_%H_%M_%S")
+        names = ("result",) + tuple(name for name in views if name in self.views)
+        recorder = VideoRecorder(os.path.join(path, "video_result_" + time_name + ".mp4"), self.fps, names,
+                                 self.record_fourcc, self.record_queue_size, self.record_drop_policy)
+        self.recorder = recorder
+        return [stream.file_path for stream in recorder.streams.values()]
+
+    def stop_recording(self):
+        """
+            This function is for write the queued frames and close the recorded videos
+        Returns:
+            list of video file paths, empty when not recording
+        """
+        recorder, self.recorder = self.recorder, None
+        if recorder is None:
+            return []
+        paths = recorder.close()
+        # also called by the model itself, when a new source is opened or the camera is changed
+        if self.on_recording_stopped is not None:
+            self.on_recording_stopped()
+        return paths
+
+    def record_frame(self, recorder, position):
+        """
+            This function is for give the rendered images of a frame to the recorder, called from process_frame
+        Args:
+            recorder: VideoRecorder
+            position: position of the frame in video
+
+        Returns:
+            None
+        """
+        # a video file is timed by the frame position, a camera by the time
+        clock = position if self.seeker is not None else time.perf_counter() * self.fps
+        images = dict(self.view_results)
+        images["result"] = self.data_properties.image_result
+        recorder.record(images, clock)
+
+    @property
+    def recording_stats(self):
+        """
+            This function is for get frame counters and write throughput of every recorded video
+        Returns:
+            dictionary of stream name and counters, None when not recording
+        """
+        recorder = self.recorder
+        return recorder.stats if recorder is not None else None
+
+    @property
+    def save_stats(self):
+        """
+            This function is for get queue depth and encode time of the image writer
+        Returns:
+            dictionary of image writer counters
+        """
+        return self.image_writer.stats
 
     def change_camera_type(self):
         """
@@ -210,12 +1183,12 @@ class Model(object):
         if self.data_properties.image_original is not None:
             if self.data_properties.properties_video["video"]:
                 camera_type = mutils.select_type_camera()
-                self.moildev = mutils.connect_to_moildev(type_camera=camera_type)
+                self.connect_to_moildev(camera_type)
                 self.running_video()
             else:
                 camera_type = mutils.select_type_camera()
                 mutils.write_camera_type(self.data_properties.source_path, camera_type)
-                self.moildev = mutils.connect_to_moildev(type_camera=camera_type)
+                self.connect_to_moildev(camera_type)
                 self.set_initial_image(mutils.read_image(self.data_properties.source_path))
             self.create_maps()
 
@@ -225,8 +1198,7 @@ class Model(object):
         Returns:
             None
         """
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        self.next_frame()
+        self.seek_frame(0)
 
     def forward_video(self):
         """
@@ -234,10 +1206,7 @@ class Model(object):
         Returns:
             None
         """
-        fps = self.cap.get(cv2.CAP_PROP_FPS)
-        position = self.data_properties.properties_video["pos_frame"] + 5 * fps
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, position)
-        self.next_frame()
+        self.seek_frame(self.data_properties.properties_video["pos_frame"] + 5 * self.fps)
 
     def rewind_video(self):
         """
@@ -245,10 +1214,7 @@ class Model(object):
         Returns:
             None
         """
-        fps = self.cap.get(cv2.CAP_PROP_FPS)
-        position = self.data_properties.properties_video["pos_frame"] - 5 * fps
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, position)
-        self.next_frame()
+        self.seek_frame(self.data_properties.properties_video["pos_frame"] - 5 * self.fps)
 
     def slider_controller(self, value, slider_maximum):
         """
@@ -260,8 +1226,121 @@ class Model(object):
             None
         """
         dst = self.data_properties.properties_video["frame_count"] * value / slider_maximum
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, dst)
+        self.seek_frame(dst)
+
+    def seek_frame(self, position):
+        """
+            This function is for show the frame at a position of video, with the keyframe index when the
+            source is a file
+        Args:
+            position: frame position, it is limited to the video
+
+        Returns:
+            None
+        """
+        position = max(0, int(position))
+        frame_count = self.data_properties.properties_video["frame_count"]
+        if frame_count:
+            position = min(position, int(frame_count) - 1)
+        if self.pipeline is not None and self.pipeline.is_running:
+            # only the capture thread read the capture, it seek before the next read and the frames read
+            # from the old position are dropped
+            self.pending_position = position
+            self.pipeline.flush()
+            return
+        frame = self.frame_ring.get(position) if self.frame_ring is not None else None
+        if frame is not None:
+            self.pending_position = position + 1
+            self.process_frame(frame, position + 1)
+            self.frame_ring.read_around(position)
+            return
+        self.pending_position = None
+        self.seek_capture(position)
+        self.next_position = position
         self.next_frame()
+        self.keep_paused_frame()
+
+    def seek_capture(self, position):
+        """
+            This function is for set the capture so the next read give the frame at position
+        Args:
+            position: frame position
+
+        Returns:
+            None
+        """
+        if self.seeker is not None:
+            self.seeker.seek(position)
+        else:
+            with self.capture_lock:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+
+    def keep_paused_frame(self):
+        """
+            This function is for keep the shown frame of a paused video in the frame ring buffer and read
+            the frames around it in background
+        Returns:
+            None
+        """
+        if self.frame_ring is None or self.pipeline is not None or self.data_properties.image_original is None:
+            return
+        position = int(self.data_properties.properties_video["pos_frame"]) - 1
+        if position < 0:
+            return
+        if position not in self.frame_ring:
+            # the shown frame is in a reused render buffer
+            self.frame_ring.put(position, self.data_properties.image_original.copy())
+        self.frame_ring.read_around(position)
+
+    @property
+    def frame_ring_stats(self):
+        """
+            This function is for get counters of the frame ring buffer
+        Returns:
+            dictionary of frame ring buffer counters, None when the source is not a file
+        """
+        return self.frame_ring.stats if self.frame_ring is not None else None
+
+    @property
+    def render_quality_stats(self):
+        """
+            This function is for get the quality level chosen by the render governor and the render time
+        Returns:
+            dictionary of render governor state
+        """
+        return self.render_governor.stats
+
+    @property
+    def playback_stats(self):
+        """
+            This function is for get frame rate and dropped frames of the last playback
+        Returns:
+            dictionary of playback clock counters, None when the source is not a file
+        """
+        return self.playback_clock.stats if self.playback_clock is not None else None
+
+    @property
+    def seek_stats(self):
+        """
+            This function is for get seek counters and latency of the opened video
+        Returns:
+            dictionary of seek counters, None when the source is not a file
+        """
+        return self.seeker.stats if self.seeker is not None else None
+
+    def get_thumbnail(self, value, slider_maximum):
+        """
+            This function is for get the thumbnail of the video at a slider position
+        Args:
+            value: slider position
+            slider_maximum: value maximum slider video
+
+        Returns:
+            position of thumbnail and BGR thumbnail, None if there is no thumbnail yet
+        """
+        if self.thumbnails is None or not slider_maximum:
+            return None
+        return self.thumbnails.thumbnail(self.data_properties.properties_video["frame_count"] * value / slider_maximum)
 
     def get_value_slider_video(self, value):
         """
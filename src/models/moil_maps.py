@@ -0,0 +1,394 @@
+import collections
+import json
+import math
+
+import numpy as np
+
+# version of the maps geometry, stored maps of an other version are not used
+MAPS_VERSION = 2
+# focal length in pixel of anypoint views at zoom 1, 500 / 2.54 like moildev for every camera
+ANYPOINT_FOCAL = 500 / 2.54
+# smallest incident angle of panorama, the cylinder can not reach the optical axis
+PANORAMA_MIN_ALPHA = 5
+
+
+class CameraParameter(object):
+    def __init__(self, parameter):
+        """
+        Camera parameter of a fisheye lens, from camera_parameter/*.json.
+        The lens projection is rho = (p0 * a^6 + p1 * a^5 + p2 * a^4 + p3 * a^3 + p4 * a^2 + p5 * a) * calibrationRatio,
+        with a the incident angle in radian and rho the distance from the image center (iCx, iCy) in pixel.
+        The ratio is the pixel aspect ratio applied on the x axis.
+
+        Args:
+            parameter: dictionary of camera parameter
+        """
+        super(CameraParameter, self).__init__()
+        self.camera_name = parameter.get("cameraName")
+        self.icx = float(parameter["iCx"])
+        self.icy = float(parameter["iCy"])
+        self.ratio = float(parameter.get("ratio", 1))
+        self.calibration_ratio = float(parameter.get("calibrationRatio", 1))
+        self.image_width = int(parameter["imageWidth"])
+        self.image_height = int(parameter["imageHeight"])
+        self.coefficients = tuple(float(parameter["parameter%d" % i]) for i in range(6))
+
+    @classmethod
+    def from_json(cls, file_path, camera_name=None):
+        """
+            This function is for read camera parameter from json file. The file can contain one camera,
+            or several cameras keyed by camera name
+        Args:
+            file_path: path of json file
+            camera_name: name of camera when the file contain several cameras
+
+        Returns:
+            CameraParameter
+        """
+        with open(file_path) as file:
+            data = json.load(file)
+        if "parameter0" not in data:
+            if camera_name is None:
+                if len(data) != 1:
+                    raise ValueError("camera_name is required, %s contain several cameras" % file_path)
+                camera_name = next(iter(data))
+            data = dict(data[camera_name], cameraName=data[camera_name].get("cameraName", camera_name))
+        return cls(data)
+
+    @staticmethod
+    def camera_names(file_path):
+        """
+            This function is for list the cameras of a camera parameter json file
+        Args:
+            file_path: path of json file
+
+        Returns:
+            list of camera names, one name (can be None) when the file contain one camera
+        """
+        with open(file_path) as file:
+            data = json.load(file)
+        if "parameter0" in data:
+            return [data.get("cameraName")]
+        return list(data)
+
+    @property
+    def key(self):
+        """
+            This function is for get hashable key of the camera parameter, used by map cache
+        Returns:
+            tuple of camera parameter
+        """
+        return (self.camera_name, self.icx, self.icy, self.ratio, self.calibration_ratio,
+                self.image_width, self.image_height) + self.coefficients
+
+    def alpha_to_rho(self, alpha):
+        """
+            This function is for compute image radius from incident angle with lens polynomial
+        Args:
+            alpha: incident angle in radian, scalar or numpy array
+
+        Returns:
+            image radius in pixel
+        """
+        rho = 0
+        for coefficient in self.coefficients:
+            rho = (rho + coefficient) * alpha
+        return rho * self.calibration_ratio
+
+    def max_alpha(self):
+        """
+            This function is for get the largest incident angle where lens polynomial still increase
+        Returns:
+            incident angle in radian
+        """
+        alpha = np.linspace(0, math.pi, 18001)
+        increasing = np.diff(self.alpha_to_rho(alpha)) > 0
+        if increasing.all():
+            return math.pi
+        return float(alpha[np.argmin(increasing)])
+
+
+def rotation_x(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array([[1, 0, 0], [0, c, -s], [0, s, c]])
+
+
+def rotation_y(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array([[c, 0, s], [0, 1, 0], [-s, 0, c]])
+
+
+def rotation_z(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]])
+
+
+class MoilMaps(object):
+    def __init__(self, camera_parameter):
+        """
+        Vectorized numpy implementation of the moildev maps (maps_anypoint, maps_anypoint_car, maps_panorama).
+        It has the same interface as moildev object so it can be used in place of it in Model.
+
+        Coordinate system: x to the right of the image, y to the bottom of the image, z along the optical axis.
+        Anypoint mode 1 tilt the view by alpha from optical axis toward direction beta (0 is up, 90 is right),
+        anypoint car mode use alpha as pitch (positive is up), beta as yaw (positive is right) and roll
+        around the view axis (moildev 4.0 ignore roll). The view is a perspective image centered on the
+        pixel (width // 2, height // 2) with a focal length of zoom * ANYPOINT_FOCAL pixels, the maps match
+        moildev within its rounding to integer pixels (benchmarks/bench_moil_maps.py).
+
+        Args:
+            camera_parameter: CameraParameter
+        """
+        super(MoilMaps, self).__init__()
+        self.camera_parameter = camera_parameter
+        self.max_alpha = camera_parameter.max_alpha()
+        self.alpha_table, self.rho_table, self.rho_to_alpha_error = self.__init_rho_alpha_table()
+
+    def __init_rho_alpha_table(self, samples=20001):
+        """
+            This function is for create dense monotonic table of incident angle and image radius on the valid
+            range of the lens polynomial, the inverse (rho to alpha) is a linear interpolation of this table.
+            The error bound is measured at the middle of every table interval, where linear interpolation
+            error is the largest
+        Args:
+            samples: number of samples in the table
+
+        Returns:
+            alpha table in radian, rho table in pixel, max error of rho to alpha in radian
+        """
+        alpha = np.linspace(0, self.max_alpha, samples)
+        rho = self.camera_parameter.alpha_to_rho(alpha)
+        alpha_middle = (alpha[1:] + alpha[:-1]) / 2
+        error = np.abs(np.interp(self.camera_parameter.alpha_to_rho(alpha_middle), rho, alpha) - alpha_middle).max()
+        return alpha, rho, float(error)
+
+    def get_rho_from_alpha(self, alpha):
+        """
+            This function is for get image radius from incident angle
+        Args:
+            alpha: incident angle in degree, scalar or numpy array
+
+        Returns:
+            image radius in pixel
+        """
+        return self.camera_parameter.alpha_to_rho(np.radians(alpha))
+
+    def get_alpha_from_rho(self, rho):
+        """
+            This function is for get incident angle from image radius with the rho to alpha table,
+            negative rho give negative alpha
+        Args:
+            rho: image radius in pixel, scalar or numpy array
+
+        Returns:
+            incident angle in degree, nan when rho is outside the lens
+        """
+        rho = np.asarray(rho, dtype=np.float64)
+        alpha = np.interp(np.abs(rho), self.rho_table, self.alpha_table, right=np.nan)
+        return np.degrees(np.copysign(alpha, rho))
+
+    def get_alpha_beta(self, coordinate_x, coordinate_y):
+        """
+            This function is for get incident angle and direction of image coordinate
+        Args:
+            coordinate_x: x coordinate in fisheye image, scalar or numpy array
+            coordinate_y: y coordinate in fisheye image, scalar or numpy array
+
+        Returns:
+            alpha, beta in degree (beta 0 is up and 90 is right), alpha is nan when outside the lens
+        """
+        delta_x = (np.asarray(coordinate_x, dtype=np.float64) - self.camera_parameter.icx) / self.camera_parameter.ratio
+        delta_y = np.asarray(coordinate_y, dtype=np.float64) - self.camera_parameter.icy
+        alpha = self.get_alpha_from_rho(np.hypot(delta_x, delta_y))
+        beta = np.degrees(np.arctan2(delta_x, -delta_y)) % 360
+        return alpha, beta
+
+    @classmethod
+    def from_json(cls, file_path, camera_name=None):
+        """
+            This function is for create MoilMaps from camera parameter json file
+        Args:
+            file_path: path of json file
+            camera_name: name of camera when the file contain several cameras
+
+        Returns:
+            MoilMaps
+        """
+        return cls(CameraParameter.from_json(file_path, camera_name))
+
+    @property
+    def key(self):
+        """
+            This function is for get hashable key of the camera, used by map cache
+        Returns:
+            tuple of camera parameter
+        """
+        return self.camera_parameter.key
+
+    def maps_size(self, scale=1.0):
+        """
+            This function is for get size of maps, the maps has the size of the fisheye image times scale
+        Args:
+            scale: scale of maps
+
+        Returns:
+            width, height
+        """
+        return (max(1, round(self.camera_parameter.image_width * scale)),
+                max(1, round(self.camera_parameter.image_height * scale)))
+
+    def __view_rays(self, rotation, zoom, scale):
+        """
+            This function is for get ray direction of every pixel of a perspective view
+        """
+        width, height = self.maps_size(scale)
+        focal = np.float32(zoom * ANYPOINT_FOCAL * scale)
+        u = (np.arange(width, dtype=np.float32) - width // 2)[np.newaxis, :]
+        v = (np.arange(height, dtype=np.float32) - height // 2)[:, np.newaxis]
+        rotation = rotation.astype(np.float32)
+        x = rotation[0, 0] * u + rotation[0, 1] * v + rotation[0, 2] * focal
+        y = rotation[1, 0] * u + rotation[1, 1] * v + rotation[1, 2] * focal
+        z = rotation[2, 0] * u + rotation[2, 1] * v + rotation[2, 2] * focal
+        return x, y, z
+
+    def __image_offset(self, x, y, z):
+        """
+            This function is for get offset from image center (iCx, iCy) of every ray, before pixel aspect ratio
+        Returns:
+            offset x, offset y, mask of rays outside the lens
+        """
+        radius_xy = np.sqrt(x * x + y * y)
+        alpha = np.arctan2(radius_xy, z)
+        factor = self.camera_parameter.alpha_to_rho(alpha)
+        np.divide(factor, radius_xy, out=factor, where=radius_xy > 0)
+        factor[radius_xy == 0] = 0
+        return factor * x, factor * y, alpha > self.max_alpha
+
+    def __project(self, x, y, z):
+        offset_x, offset_y, outside = self.__image_offset(x, y, z)
+        maps_x = (self.camera_parameter.icx + self.camera_parameter.ratio * offset_x).astype(np.float32)
+        maps_y = (self.camera_parameter.icy + offset_y).astype(np.float32)
+        maps_x[outside] = -1
+        maps_y[outside] = -1
+        return maps_x, maps_y
+
+    @staticmethod
+    def anypoint_rotation(alpha, beta, roll=0, mode=1):
+        """
+            This function is for get rotation matrix of anypoint view
+        Args:
+            alpha: alpha in degree
+            beta: beta in degree
+            roll: roll in degree, only for car mode
+            mode: 1 or 2 (car mode)
+
+        Returns:
+            rotation matrix 3x3
+        """
+        if mode == 1:
+            return rotation_z(math.radians(beta)) @ rotation_x(math.radians(alpha))
+        return rotation_y(math.radians(beta)) @ rotation_x(math.radians(alpha)) @ rotation_z(math.radians(roll))
+
+    def maps_anypoint(self, alpha, beta, zoom, mode=1, scale=1.0):
+        """
+            This function is for create anypoint maps mode 1
+        Args:
+            alpha: tilt angle from optical axis in degree
+            beta: direction of tilt in degree, 0 is up and 90 is right
+            zoom: zoom of view
+            mode: kept for moildev compatibility, mode 2 is maps_anypoint_car
+            scale: scale of maps size, the field of view is the same for every scale
+
+        Returns:
+            maps_x, maps_y
+        """
+        if mode != 1:
+            return self.maps_anypoint_car(alpha, beta, 0, zoom, scale)
+        return self.__project(*self.__view_rays(self.anypoint_rotation(alpha, beta), zoom, scale))
+
+    def maps_anypoint_car(self, alpha, beta, roll, zoom, scale=1.0):
+        """
+            This function is for create anypoint maps car mode (mode 2)
+        Args:
+            alpha: pitch angle in degree, positive is up
+            beta: yaw angle in degree, positive is right
+            roll: roll angle around the view axis in degree
+            zoom: zoom of view
+            scale: scale of maps size, the field of view is the same for every scale
+
+        Returns:
+            maps_x, maps_y
+        """
+        return self.__project(*self.__view_rays(self.anypoint_rotation(alpha, beta, roll, 2), zoom, scale))
+
+    def maps_anypoint_batch(self, parameters, mode=1, scale=1.0, max_batch_bytes=512 * 1024 * 1024):
+        """
+            This function is for create maps of many anypoint views at once.
+            In mode 1 beta is a rotation around the optical axis, so the incident angle of every pixel only depend
+            on alpha and zoom: the lens projection is computed once for every (alpha, zoom) and all betas of it
+            are produced by one broadcast rotation, in batches that stay under max_batch_bytes.
+            Car mode has no shared term, every view is computed alone
+        Args:
+            parameters: sequence of (alpha, beta, roll, zoom), roll is ignored in mode 1
+            mode: 1 or 2 (car mode)
+            scale: scale of maps size
+            max_batch_bytes: memory budget of arrays of one batch
+
+        Returns:
+            list of (maps_x, maps_y) in the order of parameters
+        """
+        parameters = np.asarray(parameters, dtype=np.float64).reshape(-1, 4)
+        if mode != 1:
+            return [self.maps_anypoint_car(alpha, beta, roll, zoom, scale) for alpha, beta, roll, zoom in parameters]
+        width, height = self.maps_size(scale)
+        # two maps and two temporary float32 arrays are alive for every view of a batch
+        views_per_batch = max(1, int(max_batch_bytes // (width * height * 4 * 4)))
+        groups = collections.OrderedDict()
+        for index, (alpha, _, _, zoom) in enumerate(parameters):
+            groups.setdefault((alpha, zoom), []).append(index)
+        maps = [None] * len(parameters)
+        for (alpha, zoom), indices in groups.items():
+            offset_x, offset_y, outside = self.__image_offset(*self.__view_rays(rotation_x(math.radians(alpha)),
+                                                                                 zoom, scale))
+            for first in range(0, len(indices), views_per_batch):
+                batch = indices[first:first + views_per_batch]
+                beta = np.radians(parameters[batch, 1])
+                cos = np.cos(beta).astype(np.float32)[:, np.newaxis, np.newaxis]
+                sin = np.sin(beta).astype(np.float32)[:, np.newaxis, np.newaxis]
+                maps_x = cos * offset_x - sin * offset_y
+                maps_x *= np.float32(self.camera_parameter.ratio)
+                maps_x += np.float32(self.camera_parameter.icx)
+                maps_y = sin * offset_x + cos * offset_y
+                maps_y += np.float32(self.camera_parameter.icy)
+                maps_x[:, outside] = -1
+                maps_y[:, outside] = -1
+                for position, index in enumerate(batch):
+                    maps[index] = (maps_x[position], maps_y[position])
+        return maps
+
+    def maps_panorama(self, alpha_min, alpha_max, scale=1.0):
+        """
+            This function is for create panorama maps like moildev panorama tube: the view is a cylinder around
+            the optical axis, the column is direction beta from 0 to 360 degree counterclockwise (0 is up) and
+            the row go from alpha_min (top) to alpha_max (bottom), linear in cot(alpha)
+        Args:
+            alpha_min: incident angle of the top row in degree, at least PANORAMA_MIN_ALPHA
+            alpha_max: incident angle of the bottom row in degree
+            scale: scale of maps size
+
+        Returns:
+            maps_x, maps_y
+        """
+        width, height = self.maps_size(scale)
+        alpha_min = max(alpha_min, PANORAMA_MIN_ALPHA)
+        beta = (np.arange(width, dtype=np.float32) * np.float32(2 * math.pi / width))[np.newaxis, :]
+        cot_min, cot_max = 1 / math.tan(math.radians(alpha_min)), 1 / math.tan(math.radians(alpha_max))
+        cot = cot_min + (cot_max - cot_min) * np.arange(height, dtype=np.float64) / height
+        alpha = np.arctan2(1, cot).astype(np.float32)[:, np.newaxis]
+        rho = self.camera_parameter.alpha_to_rho(alpha)
+        maps_x = (self.camera_parameter.icx - self.camera_parameter.ratio * rho * np.sin(beta)).astype(np.float32)
+        maps_y = np.broadcast_to(self.camera_parameter.icy - rho * np.cos(beta), (height, width)).astype(np.float32)
+        outside = np.broadcast_to(alpha > self.max_alpha, (height, width))
+        maps_x[outside] = -1
+        maps_y[outside] = -1
+        return maps_x, maps_y
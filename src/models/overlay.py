@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+
+def view_outline(maps_x, maps_y, samples_per_side=64):
+    """
+        This function is for get outline of the region of view in the fisheye image from the border of maps.
+        It is computed once when the maps change, and drawn on every preview frame
+    Args:
+        maps_x: maps x
+        maps_y: maps y
+        samples_per_side: number of points taken from every side of maps border
+
+    Returns:
+        numpy array (N, 2) of outline points in fisheye image coordinate, invalid point is nan
+    """
+    height, width = maps_x.shape[:2]
+    columns = np.linspace(0, width - 1, samples_per_side).astype(int)
+    rows = np.linspace(0, height - 1, samples_per_side).astype(int)
+    index_y = np.concatenate([np.zeros_like(columns), rows, np.full_like(columns, height - 1)[::-1], rows[::-1]])
+    index_x = np.concatenate([columns, np.full_like(rows, width - 1), columns[::-1], np.zeros_like(rows)])
+    outline = np.stack([maps_x[index_y, index_x], maps_y[index_y, index_x]], axis=1).astype(np.float32)
+    outline[(outline[:, 0] < 0) | (outline[:, 1] < 0)] = np.nan
+    return outline
+
+
+def create_preview(image, width, dst=None):
+    """
+        This function is for resize image to preview size, keep aspect ratio
+    Args:
+        image: image to resize
+        width: width of preview
+        dst: preallocated preview image, reused when the size match
+
+    Returns:
+        preview image, scale from image to preview
+    """
+    scale = width / image.shape[1]
+    height = max(1, round(image.shape[0] * scale))
+    if dst is not None and dst.shape[:2] == (height, width):
+        return cv2.resize(image, (width, height), dst=dst, interpolation=cv2.INTER_AREA), scale
+    return cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA), scale
+
+
+def draw_outline(image, outline, scale=1.0, color=(0, 0, 255), thickness=2):
+    """
+        This function is for draw outline on image, invalid points split the outline into several lines
+    Args:
+        image: image to draw, it is modified
+        outline: numpy array (N, 2) from view_outline
+        scale: scale from outline coordinate to image coordinate
+        color: color of line
+        thickness: thickness of line
+
+    Returns:
+        image
+    """
+    if outline is None:
+        return image
+    valid = ~np.isnan(outline[:, 0])
+    if valid.all():
+        cv2.polylines(image, [np.round(outline * scale).astype(np.int32)], True, color, thickness)
+        return image
+    segments = np.split(np.arange(len(outline)), np.flatnonzero(np.diff(valid.astype(int))) + 1)
+    lines = [np.round(outline[segment] * scale).astype(np.int32) for segment in segments if valid[segment[0]]]
+    cv2.polylines(image, [line for line in lines if len(line) > 1], False, color, thickness)
+    return image
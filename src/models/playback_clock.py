@@ -0,0 +1,130 @@
+import threading
+import time
+
+
+class PlaybackClock(object):
+    def __init__(self, fps):
+        """
+        Playback clock of a video file, the frame at a position is due at start time + (position - start) / fps.
+        The capture thread waits for the due time of the next frame, and skips the frames that are already
+        late when the render is slower than the frame rate, so the video keeps the speed of the source.
+
+        Args:
+            fps: frame per second of the source
+        """
+        super(PlaybackClock, self).__init__()
+        self.fps = fps
+        self.presented = 0
+        self.dropped = 0
+        self.__start_time = None
+        self.__stop_time = None
+        self.__origin = (None, 0)
+        self.__lock = threading.Lock()
+
+    @property
+    def is_running(self):
+        """
+            This function is for get running state of the clock
+        Returns:
+            True between start and stop
+        """
+        return self.__start_time is not None and self.__stop_time is None
+
+    def start(self, position):
+        """
+            This function is for start the clock at a position, counters are reset
+        Args:
+            position: position of the next frame
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.__start_time = time.perf_counter()
+            self.__stop_time = None
+            self.__origin = (self.__start_time, position)
+            self.presented = 0
+            self.dropped = 0
+
+    def stop(self):
+        """
+            This function is for stop the clock, counters are kept
+        Returns:
+            None
+        """
+        if self.is_running:
+            self.__stop_time = time.perf_counter()
+
+    def move_to(self, position):
+        """
+            This function is for continue the clock from a new position after a seek, counters are kept
+        Args:
+            position: position of the next frame
+
+        Returns:
+            None
+        """
+        self.__origin = (time.perf_counter(), position)
+
+    def position_now(self):
+        """
+            This function is for get the position due now
+        Returns:
+            position in frame, not rounded
+        """
+        origin_time, origin_position = self.__origin
+        return origin_position + (time.perf_counter() - origin_time) * self.fps
+
+    def wait_for(self, position):
+        """
+            This function is for decide what to do with the next frame: wait until it is due, or skip the frames
+            that are already late
+        Args:
+            position: position of the next frame
+
+        Returns:
+            number of frames to skip, 0 after waiting until the frame is due
+        """
+        late = self.position_now() - position
+        if late >= 1:
+            return int(late)
+        # short sleeps, stop does not wait for a frame far ahead
+        while late < 0 and self.is_running:
+            time.sleep(min(-late / self.fps, 0.05))
+            late = self.position_now() - position
+        return 0
+
+    def frame_presented(self):
+        """
+            This function is for count a rendered frame
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.presented += 1
+
+    def frames_dropped(self, count):
+        """
+            This function is for count skipped frames
+        Args:
+            count: number of frames
+
+        Returns:
+            None
+        """
+        with self.__lock:
+            self.dropped += count
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters of the clock
+        Returns:
+            dictionary of target fps, achieved fps, presented and dropped frames
+        """
+        if self.__start_time is None:
+            elapsed = 0
+        else:
+            elapsed = (self.__stop_time or time.perf_counter()) - self.__start_time
+        return {"fps": self.fps, "achieved_fps": self.presented / elapsed if elapsed else 0.0,
+                "presented": self.presented, "dropped": self.dropped}
@@ -0,0 +1,114 @@
+import cv2
+
+# from the best to the cheapest: name, scale of output size, interpolation
+QUALITY_LEVELS = (("full", 1.0, cv2.INTER_LINEAR),
+                  ("full_nearest", 1.0, cv2.INTER_NEAREST),
+                  ("half", 0.5, cv2.INTER_LINEAR),
+                  ("half_nearest", 0.5, cv2.INTER_NEAREST))
+
+
+class RenderGovernor(object):
+    def __init__(self, fps=30.0, load=0.8, down_frames=3, up_frames=30, up_ratio=0.4, levels=QUALITY_LEVELS):
+        """
+        Render quality control for real-time output. The render time of every frame is compared with the frame
+        budget (load / fps): after down_frames frames over budget the quality goes one level down (nearest
+        interpolation, then half size maps), after up_frames frames under up_ratio of the budget it goes one
+        level up. The gap between the two thresholds and the frame counts is the hysteresis, a render time near
+        the budget does not switch the quality on every frame.
+
+        Args:
+            fps: frame rate of the source
+            load: part of the frame time the result render can use
+            down_frames: number of frames over budget before going down
+            up_frames: number of frames with headroom before going up
+            up_ratio: part of the budget under which a frame has headroom, the level above cost about twice
+            levels: quality levels (name, scale, interpolation) from the best to the cheapest
+        """
+        super(RenderGovernor, self).__init__()
+        self.fps = fps
+        self.load = load
+        self.down_frames = down_frames
+        self.up_frames = up_frames
+        self.up_ratio = up_ratio
+        self.levels = levels
+        self.enabled = True
+        self.level = 0
+        self.last_seconds = 0.0
+        self.steps_down = 0
+        self.steps_up = 0
+        self.__over = 0
+        self.__under = 0
+
+    @property
+    def budget(self):
+        """
+            This function is for get the render time allowed for one frame
+        Returns:
+            time in seconds
+        """
+        return self.load / self.fps
+
+    @property
+    def quality(self):
+        """
+            This function is for get the current quality level
+        Returns:
+            name, scale of output size, interpolation
+        """
+        return self.levels[self.level]
+
+    def reset(self, fps=None):
+        """
+            This function is for go back to the best quality, when a new source is opened
+        Args:
+            fps: frame rate of the new source
+
+        Returns:
+            None
+        """
+        if fps:
+            self.fps = fps
+        self.level = 0
+        self.__over = self.__under = 0
+
+    def record(self, seconds):
+        """
+            This function is for give the render time of a frame, the level is changed when needed
+        Args:
+            seconds: render time
+
+        Returns:
+            True if the level changed
+        """
+        self.last_seconds = seconds
+        if not self.enabled:
+            return False
+        budget = self.budget
+        if seconds > budget:
+            self.__over += 1
+            self.__under = 0
+        elif seconds < budget * self.up_ratio:
+            self.__under += 1
+            self.__over = 0
+        else:
+            self.__over = self.__under = 0
+        if self.__over >= self.down_frames and self.level < len(self.levels) - 1:
+            self.level += 1
+            self.steps_down += 1
+        elif self.__under >= self.up_frames and self.level > 0:
+            self.level -= 1
+            self.steps_up += 1
+        else:
+            return False
+        self.__over = self.__under = 0
+        return True
+
+    @property
+    def stats(self):
+        """
+            This function is for get state of the governor
+        Returns:
+            dictionary of quality name, level, last render time and budget in ms, steps down and up
+        """
+        return {"quality": self.quality[0], "level": self.level, "last_ms": self.last_seconds * 1000,
+                "budget_ms": self.budget * 1000, "steps_down": self.steps_down, "steps_up": self.steps_up}
@@ -0,0 +1,57 @@
+import cv2
+
+
+def sampled_region(maps_x, maps_y, image_size, margin=1):
+    """
+        This function is for get the bounding box of the original image pixels read by the maps,
+        with a margin for the neighbours of bilinear interpolation. Pixels outside of the lens (-1) are ignored
+    Args:
+        maps_x: float maps x
+        maps_y: float maps y
+        image_size: (width, height) of original image
+        margin: number of pixels added around the box
+
+    Returns:
+        (x, y, width, height), None when no pixel is read
+    """
+    mask = cv2.bitwise_and(cv2.compare(maps_x, 0, cv2.CMP_GE), cv2.compare(maps_y, 0, cv2.CMP_GE))
+    if not cv2.countNonZero(mask):
+        return None
+    min_x, max_x = cv2.minMaxLoc(maps_x, mask)[:2]
+    min_y, max_y = cv2.minMaxLoc(maps_y, mask)[:2]
+    x = max(0, int(min_x) - margin)
+    y = max(0, int(min_y) - margin)
+    width = min(image_size[0], int(max_x) + 2 + margin) - x
+    height = min(image_size[1], int(max_y) + 2 + margin) - y
+    if width <= 0 or height <= 0:
+        return None
+    return x, y, width, height
+
+
+def rebase_maps(fixed_xy, region):
+    """
+        This function is for move fixed-point coordinate maps to the origin of a region
+    Args:
+        fixed_xy: fixed-point coordinate maps (CV_16SC2)
+        region: (x, y, width, height)
+
+    Returns:
+        fixed-point coordinate maps of the cropped image
+    """
+    return cv2.subtract(fixed_xy, (region[0], region[1], 0, 0))
+
+
+def crop_image(image, region):
+    """
+        This function is for take a region of image without copy
+    Args:
+        image: image
+        region: (x, y, width, height), None for the whole image
+
+    Returns:
+        view of the region
+    """
+    if region is None:
+        return image
+    x, y, width, height = region
+    return image[y:y + height, x:x + width]
@@ -0,0 +1,235 @@
+import os
+import threading
+import uuid
+
+import cv2
+import numpy as np
+
+from .map_store import default_directory
+from .video_index import file_digest, load_keyframes
+
+THUMBNAIL_VERSION = 2
+# a thumbnail is moved to the nearest keyframe only when it is nearer than this fraction of the spacing
+KEYFRAME_SNAP = 0.25
+
+
+def thumbnail_positions(frame_count, count, keyframes=None, snap=KEYFRAME_SNAP):
+    """
+        This function is for choose the frames of the thumbnails, evenly spread over the video. With keyframes,
+        a position near a keyframe is moved to the keyframe, it is decoded without decoding the frames before.
+        Other positions are kept, so long keyframe groups do not collapse many thumbnails on one frame
+    Args:
+        frame_count: number of frames
+        count: number of thumbnails
+        keyframes: sorted keyframe positions
+        snap: maximum distance to the keyframe as a fraction of the spacing of thumbnails
+
+    Returns:
+        sorted list of unique frame positions
+    """
+    if frame_count <= 0:
+        return []
+    count = min(count, frame_count)
+    wanted = np.linspace(0, frame_count - 1, count).round().astype(int)
+    if keyframes and count > 1:
+        keyframes = np.asarray(keyframes)
+        index = np.searchsorted(keyframes, wanted)
+        before = keyframes[np.clip(index - 1, 0, len(keyframes) - 1)]
+        after = keyframes[np.clip(index, 0, len(keyframes) - 1)]
+        nearest = np.where(np.abs(wanted - before) <= np.abs(after - wanted), before, after)
+        limit = snap * (frame_count - 1) / (count - 1)
+        wanted = np.where(np.abs(nearest - wanted) <= limit, nearest, wanted)
+    return sorted(set(int(p) for p in wanted))
+
+
+class ThumbnailStrip(object):
+    def __init__(self, file_path, count=64, height=72, directory=None, on_ready=None, seeker=None):
+        """
+        Small thumbnails of frames spread over a video, to preview the position under the mouse on the
+        video slider. A low priority background thread with its own cv2.VideoCapture decodes them, it waits while
+        the video is playing so it does not take CPU from the playback. The thumbnails are cached on disk per file.
+
+        Args:
+            file_path: path of video
+            count: number of thumbnails
+            height: height of thumbnails in pixel
+            directory: directory of thumbnail cache, default is default_directory("thumbnails")
+            on_ready: function called from the thread when all thumbnails are ready
+            seeker: FrameSeeker of the same video, its keyframe index is used instead of loading it again
+        """
+        super(ThumbnailStrip, self).__init__()
+        self.file_path = file_path
+        self.count = count
+        self.height = height
+        self.directory = directory or default_directory("thumbnails")
+        self.on_ready = on_ready
+        self.seeker = seeker
+        self.positions = []
+        self.thumbnails = []
+        self.__lock = threading.Lock()
+        self.__running = threading.Event()
+        self.__allowed = threading.Event()
+        self.__allowed.set()
+        self.__ready = threading.Event()
+        self.__thread = None
+
+    @property
+    def is_ready(self):
+        """
+            This function is for get state of the thumbnails
+        Returns:
+            True if every thumbnail is decoded
+        """
+        return self.__ready.is_set()
+
+    def start(self):
+        """
+            This function is for start thumbnail thread
+        Returns:
+            None
+        """
+        if self.__running.is_set():
+            return
+        self.__running.set()
+        self.__thread = threading.Thread(target=self.__run, name="thumbnail-strip", daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+            This function is for stop thumbnail thread
+        Args:
+            timeout: maximum waiting time in seconds
+
+        Returns:
+            None
+        """
+        self.__running.clear()
+        self.__allowed.set()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+        self.__thread = None
+
+    def pause(self):
+        """
+            This function is for hold the thread while the video is playing
+        Returns:
+            None
+        """
+        self.__allowed.clear()
+
+    def resume(self):
+        """
+            This function is for let the thread continue when the video is paused
+        Returns:
+            None
+        """
+        self.__allowed.set()
+
+    def wait_ready(self, timeout=None):
+        """
+            This function is for wait until every thumbnail is decoded
+        Args:
+            timeout: maximum waiting time in seconds
+
+        Returns:
+            True if every thumbnail is decoded
+        """
+        return self.__ready.wait(timeout)
+
+    def thumbnail(self, position):
+        """
+            This function is for get the thumbnail nearest to a position
+        Args:
+            position: frame position
+
+        Returns:
+            position of thumbnail and BGR thumbnail, None if no thumbnail is decoded yet
+        """
+        with self.__lock:
+            if not self.positions:
+                return None
+            index = int(np.argmin(np.abs(np.asarray(self.positions) - position)))
+            return self.positions[index], self.thumbnails[index]
+
+    def __cache_path(self):
+        return os.path.join(self.directory, "%s_%d_%d_v%d.npz" % (
+            file_digest(self.file_path), self.count, self.height, THUMBNAIL_VERSION))
+
+    def __run(self):
+        try:
+            # only this thread, the playback threads keep their priority
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        cache_path = self.__cache_path()
+        try:
+            with np.load(cache_path) as data:
+                positions, thumbnails = data["positions"].tolist(), list(data["thumbnails"])
+            with self.__lock:
+                self.positions, self.thumbnails = positions, thumbnails
+            self.__finish()
+            return
+        except (OSError, ValueError, KeyError):
+            pass
+        if self.__decode():
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                temporary = "%s.tmp-%s.npz" % (cache_path[:-4], uuid.uuid4().hex)
+                np.savez(temporary, positions=np.asarray(self.positions), thumbnails=np.stack(self.thumbnails))
+                os.replace(temporary, cache_path)
+            except (OSError, ValueError):
+                pass
+            self.__finish()
+
+    def __keyframes(self):
+        if self.seeker is None:
+            return load_keyframes(self.file_path)
+        if self.seeker.wait_ready():
+            return self.seeker.keyframes, self.seeker.frame_count
+        return None
+
+    def __decode(self):
+        keyframes = self.__keyframes()
+        cap = cv2.VideoCapture(self.file_path)
+        try:
+            frame_count = keyframes[1] if keyframes else int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            for position in thumbnail_positions(frame_count, self.count, keyframes[0] if keyframes else None):
+                self.__allowed.wait()
+                if not self.__running.is_set():
+                    return False
+                if not self.__seek(cap, position, keyframes[0] if keyframes else None):
+                    break
+                success, frame = cap.read()
+                if not success:
+                    break
+                width = max(1, round(frame.shape[1] * self.height / frame.shape[0]))
+                thumbnail = cv2.resize(frame, (width, self.height), interpolation=cv2.INTER_AREA)
+                with self.__lock:
+                    self.positions.append(position)
+                    self.thumbnails.append(thumbnail)
+        finally:
+            cap.release()
+        return bool(self.positions)
+
+    @staticmethod
+    def __seek(cap, position, keyframes):
+        current = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+        if current == position:
+            return True
+        if not keyframes:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+            return True
+        keyframe = keyframes[max(0, int(np.searchsorted(keyframes, position, side="right")) - 1)]
+        if not keyframe <= current <= position:
+            # restart the decoder at the keyframe before, unless the target is ahead in the current group
+            cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+            current = keyframe
+        for _ in range(position - current):
+            if not cap.grab():
+                return False
+        return True
+
+    def __finish(self):
+        self.__ready.set()
+        if self.on_ready is not None:
+            self.on_ready()
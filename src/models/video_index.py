@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+import cv2
+
+from .map_store import default_directory
+
+INDEX_VERSION = 1
+DIGEST_SAMPLE = 1024 * 1024
+
+
+def file_digest(file_path):
+    """
+        This function is for get the identity of a media file from its size and the first and last megabyte,
+        a long video is not read completely
+    Args:
+        file_path: path of file
+
+    Returns:
+        sha256 hex digest
+    """
+    size = os.path.getsize(file_path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(file_path, "rb") as file:
+        digest.update(file.read(DIGEST_SAMPLE))
+        if size > DIGEST_SAMPLE:
+            file.seek(max(DIGEST_SAMPLE, size - DIGEST_SAMPLE))
+            digest.update(file.read(DIGEST_SAMPLE))
+    return digest.hexdigest()
+
+
+def read_keyframes(file_path):
+    """
+        This function is for list keyframes of a video. The packets are read without decoding (FFmpeg raw mode
+        of OpenCV) and the keyframe flag of every packet is checked
+    Args:
+        file_path: path of video
+
+    Returns:
+        list of keyframe positions and number of frames, None when the backend can not read raw packets
+    """
+    cap = cv2.VideoCapture(file_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_FORMAT, -1])
+    try:
+        if not cap.isOpened() or cap.get(cv2.CAP_PROP_FORMAT) != -1:
+            return None
+        keyframes = []
+        frame_count = 0
+        while cap.grab():
+            if cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+                keyframes.append(frame_count)
+            frame_count += 1
+    finally:
+        cap.release()
+    if not keyframes or keyframes[0] != 0:
+        return None
+    return keyframes, frame_count
+
+
+def load_keyframes(file_path, directory=None):
+    """
+        This function is for get keyframes of a video from the index cache on disk, the video is read and
+        the index is written when it is not in cache
+    Args:
+        file_path: path of video
+        directory: directory of index cache, default is default_directory("keyframes")
+
+    Returns:
+        list of keyframe positions and number of frames, None if the keyframes can not be read
+    """
+    directory = directory or default_directory("keyframes")
+    index_path = os.path.join(directory, file_digest(file_path) + ".json")
+    try:
+        with open(index_path) as file:
+            index = json.load(file)
+        if index.get("version") == INDEX_VERSION:
+            return index["keyframes"], index["frame_count"]
+    except (OSError, ValueError, KeyError):
+        pass
+    result = read_keyframes(file_path)
+    if result is not None:
+        try:
+            os.makedirs(directory, exist_ok=True)
+            temporary = "%s.tmp-%s" % (index_path, uuid.uuid4().hex)
+            with open(temporary, "w") as file:
+                json.dump({"version": INDEX_VERSION, "keyframes": result[0], "frame_count": result[1]}, file)
+            os.replace(temporary, index_path)
+        except OSError:
+            pass
+    return result
+
+
+class FrameSeeker(object):
+    def __init__(self, cap, file_path, capture_lock=None, directory=None):
+        """
+        Frame accurate seeking of a video with a keyframe index.
+        The index is loaded from disk or built once in a background thread when the video is opened.
+        A target in the same keyframe group, ahead of the current position, is reached by decoding forward only
+        (grab without color conversion), without a new seek. Other targets are given to the FFmpeg backend,
+        which seek to the keyframe before and decode forward itself. Until the index is ready,
+        cv2.CAP_PROP_POS_FRAMES is used for every target.
+
+        Args:
+            cap: opened cv2.VideoCapture of the video
+            file_path: path of the video
+            capture_lock: lock shared with other user of the capture
+            directory: directory of index cache
+        """
+        super(FrameSeeker, self).__init__()
+        self.cap = cap
+        self.file_path = file_path
+        self.capture_lock = capture_lock if capture_lock is not None else threading.Lock()
+        self.keyframes = None
+        self.frame_count = None
+        self.seeks = 0
+        self.decoded = 0
+        self.seek_seconds = 0.0
+        self.last_seek_seconds = 0.0
+        self.max_seek_seconds = 0.0
+        self.__thread = threading.Thread(target=self.__load_index, args=(directory,), name="keyframe-index",
+                                         daemon=True)
+        self.__thread.start()
+
+    def __load_index(self, directory):
+        result = load_keyframes(self.file_path, directory)
+        if result is not None:
+            self.keyframes, self.frame_count = result
+
+    @property
+    def is_ready(self):
+        """
+            This function is for get state of the keyframe index
+        Returns:
+            True if the keyframe index is built
+        """
+        return self.keyframes is not None
+
+    def wait_ready(self, timeout=None):
+        """
+            This function is for wait until the keyframe index is built or failed
+        Args:
+            timeout: maximum waiting time in seconds
+
+        Returns:
+            True if the keyframe index is built
+        """
+        self.__thread.join(timeout)
+        return self.is_ready
+
+    def keyframe_before(self, position):
+        """
+            This function is for get the nearest keyframe at or before a position
+        Args:
+            position: frame position
+
+        Returns:
+            keyframe position, None without index
+        """
+        keyframes = self.keyframes
+        if keyframes is None:
+            return None
+        low, high = 0, len(keyframes)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if keyframes[middle] <= position:
+                low = middle
+            else:
+                high = middle
+        return keyframes[low]
+
+    def seek(self, position):
+        """
+            This function is for set the capture so the next read return the frame at position
+        Args:
+            position: frame position
+
+        Returns:
+            None
+        """
+        start = time.perf_counter()
+        position = max(0, int(position))
+        if self.frame_count is not None:
+            position = min(position, self.frame_count - 1)
+        with self.capture_lock:
+            keyframe = self.keyframe_before(position)
+            if keyframe is None:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+            else:
+                current = int(self.cap.get(cv2.CAP_PROP_POS_FRAMES))
+                if not keyframe <= current <= position:
+                    # the decoder must restart from a keyframe, unless the target is in the current group
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, position)
+                    current = position
+                for _ in range(position - current):
+                    if not self.cap.grab():
+                        break
+                    self.decoded += 1
+        seconds = time.perf_counter() - start
+        self.seeks += 1
+        self.seek_seconds += seconds
+        self.last_seek_seconds = seconds
+        self.max_seek_seconds = max(self.max_seek_seconds, seconds)
+
+    @property
+    def stats(self):
+        """
+            This function is for get seek counters
+        Returns:
+            dictionary of index state, number of keyframes, seeks, decoded frames and seek latency in ms
+        """
+        return {"ready": self.is_ready, "keyframes": len(self.keyframes) if self.keyframes else 0,
+                "seeks": self.seeks, "decoded": self.decoded,
+                "last_ms": self.last_seek_seconds * 1000, "max_ms": self.max_seek_seconds * 1000,
+                "mean_ms": self.seek_seconds / self.seeks * 1000 if self.seeks else 0.0}
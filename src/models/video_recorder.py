@@ -0,0 +1,232 @@
+import collections
+import os
+import threading
+import time
+
+import cv2
+
+from .frame_pipeline import DROP_POLICIES
+
+
+def stream_path(output_path, name):
+    """
+        This function is for get the path of a recorded stream, the main result is written to output_path and
+        the name of other streams is added to the file name
+    Args:
+        output_path: path of output video
+        name: name of stream, "result" for the main result
+
+    Returns:
+        path of video file
+    """
+    if name == "result":
+        return output_path
+    stem, extension = os.path.splitext(output_path)
+    return "%s_%s%s" % (stem, name, extension)
+
+
+class RecordStream(object):
+    def __init__(self, file_path, fps, fourcc="mp4v", queue_size=8, drop_policy="drop_oldest"):
+        """
+        One recorded video. Frames are copied into a bounded queue and a writer thread encodes them with
+        cv2.VideoWriter, opened with the size of the first frame; a frame of another size (the render quality
+        changed) is resized to it. A frame may be written several times to keep the timing of the source.
+        When the queue is full, "block" wait for a free place, "drop_oldest" replace the oldest frame and
+        "drop_newest" discard the new frame, the time of a dropped frame is given to its neighbour.
+
+        Args:
+            file_path: path of video file
+            fps: frame per second of video
+            fourcc: fourcc code of video
+            queue_size: maximum number of frames waiting for encoding
+            drop_policy: "block", "drop_oldest" or "drop_newest"
+        """
+        super(RecordStream, self).__init__()
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError("drop_policy must be one of %s" % (DROP_POLICIES,))
+        self.file_path = file_path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.queue_size = max(1, queue_size)
+        self.drop_policy = drop_policy
+        self.received = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = False
+        self.written_bytes = 0
+        self.write_seconds = 0.0
+        self.last_seconds = 0.0
+        self.__queue = collections.deque()
+        self.__condition = threading.Condition()
+        self.__closing = False
+        self.__start_time = time.perf_counter()
+        self.__stop_time = None
+        self.__thread = threading.Thread(target=self.__write_loop, name="record-stream", daemon=True)
+        self.__thread.start()
+
+    def put(self, image, repeat=1):
+        """
+            This function is for queue a frame
+        Args:
+            image: BGR image, it is copied
+            repeat: number of times the frame is written
+
+        Returns:
+            True if the frame is queued
+        """
+        with self.__condition:
+            if self.__closing:
+                return False
+            self.received += 1
+            if len(self.__queue) >= self.queue_size and self.drop_policy == "drop_newest":
+                self.dropped += 1
+                self.__queue[-1][1] += repeat
+                return False
+        image = image.copy()
+        with self.__condition:
+            if self.drop_policy == "block":
+                self.__condition.wait_for(lambda: len(self.__queue) < self.queue_size or self.__closing)
+            elif len(self.__queue) >= self.queue_size:
+                self.dropped += 1
+                repeat += self.__queue.popleft()[1]
+            self.__queue.append([image, repeat])
+            self.__condition.notify_all()
+        return True
+
+    def close(self, timeout=None):
+        """
+            This function is for write the queued frames and close the video file
+        Args:
+            timeout: maximum waiting time in seconds
+
+        Returns:
+            None
+        """
+        with self.__condition:
+            self.__closing = True
+            self.__condition.notify_all()
+        if self.__thread is not threading.current_thread():
+            self.__thread.join(timeout)
+
+    def __write_loop(self):
+        writer = None
+        while True:
+            with self.__condition:
+                self.__condition.wait_for(lambda: self.__queue or self.__closing)
+                if not self.__queue:
+                    break
+                image, repeat = self.__queue.popleft()
+                self.__condition.notify_all()
+            start = time.perf_counter()
+            if writer is None:
+                size = (image.shape[1], image.shape[0])
+                writer = cv2.VideoWriter(self.file_path, cv2.VideoWriter_fourcc(*self.fourcc), self.fps, size)
+                self.failed = not writer.isOpened()
+            if image.shape[1::-1] != size:
+                image = cv2.resize(image, size, interpolation=cv2.INTER_LINEAR)
+            for _ in range(repeat):
+                writer.write(image)
+            seconds = time.perf_counter() - start
+            self.written += repeat
+            self.written_bytes += image.nbytes * repeat
+            self.write_seconds += seconds
+            self.last_seconds = seconds
+        if writer is not None:
+            writer.release()
+        self.__stop_time = time.perf_counter()
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters and write throughput of the stream
+        Returns:
+            dictionary of received, written, dropped and queued frames, write time per written frame,
+            frames and megabytes of raw image written per second
+        """
+        elapsed = (self.__stop_time or time.perf_counter()) - self.__start_time
+        return {"received": self.received, "written": self.written, "dropped": self.dropped,
+                "queued": len(self.__queue), "failed": self.failed, "last_ms": self.last_seconds * 1000,
+                "mean_ms": self.write_seconds / self.written * 1000 if self.written else 0.0,
+                "fps": self.written / elapsed if elapsed else 0.0,
+                "mb_per_second": self.written_bytes / elapsed / 1e6 if elapsed else 0.0}
+
+
+class VideoRecorder(object):
+    def __init__(self, output_path, fps, names=("result",), fourcc="mp4v", queue_size=8, drop_policy="drop_oldest"):
+        """
+        Recorder of the rendered output, one RecordStream per name (the main result and named views).
+        Every frame is given with a clock in frames of the source (position of a video file, time * fps for
+        a camera): frames skipped by the playback are filled by writing the next frame several times, so the
+        recorded video keeps the speed of the source. A jump of more than one second (pause, seek) is not filled.
+
+        Args:
+            output_path: path of the main video, other streams get their name added
+            fps: frame per second of the source
+            names: names of streams
+            fourcc: fourcc code of video
+            queue_size: maximum number of frames waiting in every stream
+            drop_policy: "block", "drop_oldest" or "drop_newest"
+        """
+        super(VideoRecorder, self).__init__()
+        self.output_path = output_path
+        self.fps = fps
+        self.max_repeat = max(1, int(round(fps)))
+        directory = os.path.dirname(output_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.streams = collections.OrderedDict(
+            (name, RecordStream(stream_path(output_path, name), fps, fourcc, queue_size, drop_policy))
+            for name in names)
+        self.__origin = None
+        self.__last_clock = None
+        self.__frames = 0
+
+    def record(self, images, clock):
+        """
+            This function is for give the rendered images of a frame
+        Args:
+            images: dictionary of stream name and image, a missing image is not written
+            clock: time of the frame in frames of the source
+
+        Returns:
+            number of times the frame is written, 0 when the clock did not reach the next frame
+        """
+        if self.__origin is None or clock < self.__last_clock:
+            # start, or the video went back: continue the recording from here
+            self.__origin = clock - self.__frames - 1
+        self.__last_clock = clock
+        due = int(clock - self.__origin)
+        if due <= self.__frames:
+            return 0
+        repeat = due - self.__frames
+        if repeat > self.max_repeat:
+            repeat = 1
+            self.__origin = clock - self.__frames - 1
+        self.__frames += repeat
+        for name, stream in self.streams.items():
+            image = images.get(name)
+            if image is not None:
+                stream.put(image, repeat)
+        return repeat
+
+    def close(self, timeout=None):
+        """
+            This function is for write the queued frames and close every video file
+        Args:
+            timeout: maximum waiting time in seconds for every stream
+
+        Returns:
+            list of video file paths
+        """
+        for stream in self.streams.values():
+            stream.close(timeout)
+        return [stream.file_path for stream in self.streams.values()]
+
+    @property
+    def stats(self):
+        """
+            This function is for get counters of every stream
+        Returns:
+            dictionary of stream name and stream counters
+        """
+        return {name: stream.stats for name, stream in self.streams.items()}
@@ -0,0 +1,130 @@
+VIEW_MODES = {"anypoint": ("alpha", "beta", "zoom"),
+              "car": ("alpha", "beta", "roll", "zoom"),
+              "panorama": ("alpha_min", "alpha_max")}
+
+
+class ViewSpec(object):
+    def __init__(self, mode_view, name=None, alpha=0, beta=0, roll=0, zoom=2, mode=1, alpha_min=10, alpha_max=110):
+        """
+        Parameters of one view (Anypoint mode 1, Anypoint car mode or Panorama), independent from user interface.
+        The key of a view is the same as Model.maps_key so maps can be shared with map cache.
+
+        Args:
+            mode_view: "Anypoint" or "Panorama"
+            name: name of view, created from parameters if None
+            alpha: alpha of anypoint
+            beta: beta of anypoint
+            roll: roll of anypoint car mode
+            zoom: zoom of anypoint
+            mode: anypoint mode, 1 or 2 (car)
+            alpha_min: minimum alpha of panorama
+            alpha_max: maximum alpha of panorama
+        """
+        super(ViewSpec, self).__init__()
+        if mode_view not in ("Anypoint", "Panorama"):
+            raise ValueError("mode_view must be Anypoint or Panorama, not %r" % mode_view)
+        self.mode_view = mode_view
+        self.properties_anypoint = {"alpha": alpha, "beta": beta, "roll": roll, "zoom": zoom, "mode": mode}
+        self.properties_panorama = {"alpha_min": alpha_min, "alpha_max": alpha_max}
+        self.name = name or "_".join(str(value) for value in self.key(None)[1:]).lower()
+
+    @classmethod
+    def from_properties(cls, mode_view, properties_anypoint, properties_panorama, name=None):
+        """
+            This function is for create view from DataProperties dictionaries
+        Args:
+            mode_view: "Anypoint" or "Panorama"
+            properties_anypoint: properties anypoint
+            properties_panorama: properties panorama
+            name: name of view
+
+        Returns:
+            ViewSpec
+        """
+        return cls(mode_view, name, alpha_min=properties_panorama["alpha_min"],
+                   alpha_max=properties_panorama["alpha_max"], **properties_anypoint)
+
+    @classmethod
+    def parse(cls, text):
+        """
+            This function is for create view from text "[name=]mode:values", mode is anypoint, car or panorama,
+            values are positional or keyword, for example "front=anypoint:75,0,2", "car:alpha=50,roll=10"
+            or "panorama:10,110"
+        Args:
+            text: view text
+
+        Returns:
+            ViewSpec
+        """
+        name = None
+        head, _, values = text.partition(":")
+        if "=" in head:
+            name, head = head.split("=", 1)
+        mode = head.strip().lower()
+        if mode not in VIEW_MODES:
+            raise ValueError("unknown view mode %r in %r, use one of %s" % (mode, text, ", ".join(VIEW_MODES)))
+        parameters = {}
+        for index, value in enumerate(v for v in values.split(",") if v.strip()):
+            if "=" in value:
+                key, value = value.split("=", 1)
+                key = key.strip()
+                if key not in VIEW_MODES[mode]:
+                    raise ValueError("unknown parameter %r for %s view" % (key, mode))
+            elif index < len(VIEW_MODES[mode]):
+                key = VIEW_MODES[mode][index]
+            else:
+                raise ValueError("too many values in %r" % text)
+            parameters[key] = float(value)
+            if parameters[key].is_integer() and key != "zoom":
+                parameters[key] = int(parameters[key])
+        if mode == "panorama":
+            return cls("Panorama", name, **parameters)
+        return cls("Anypoint", name, mode=2 if mode == "car" else 1, **parameters)
+
+    def key(self, camera_key):
+        """
+            This function is for get maps key of the view
+        Args:
+            camera_key: camera type or camera parameter key
+
+        Returns:
+            tuple of camera key and view parameters
+        """
+        anypoint = self.properties_anypoint
+        if self.mode_view == "Anypoint":
+            if anypoint["mode"] == 1:
+                return camera_key, "Anypoint", 1, anypoint["alpha"], anypoint["beta"], anypoint["zoom"]
+            return (camera_key, "Anypoint", anypoint["mode"], anypoint["alpha"], anypoint["beta"],
+                    anypoint["roll"], anypoint["zoom"])
+        return camera_key, "Panorama", self.properties_panorama["alpha_min"], self.properties_panorama["alpha_max"]
+
+    def build_maps(self, moildev, scale=1.0):
+        """
+            This function is for build maps of the view
+        Args:
+            moildev: moildev or MoilMaps object
+            scale: scale of maps size, only supported by MoilMaps
+
+        Returns:
+            maps_x, maps_y
+        """
+        return build_maps_from_key(moildev, self.key(None), scale)
+
+
+def build_maps_from_key(moildev, key, scale=1.0):
+    """
+        This function is for build maps from a maps key
+    Args:
+        moildev: moildev or MoilMaps object
+        key: maps key
+        scale: scale of maps size, only supported by MoilMaps, maps size is scaled
+
+    Returns:
+        maps_x, maps_y
+    """
+    arguments = {} if scale == 1.0 else {"scale": scale}
+    if key[1] == "Anypoint":
+        if key[2] == 1:
+            return moildev.maps_anypoint(key[3], key[4], key[5], 1, **arguments)
+        return moildev.maps_anypoint_car(key[3], key[4], key[5], key[6], **arguments)
+    return moildev.maps_panorama(key[2], key[3], **arguments)
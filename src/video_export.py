@@ -0,0 +1,265 @@
+"""
+Offline export of dewarped views of a fisheye video, without user interface.
+
+The video is split into frame ranges (chunks), every chunk is decoded, dewarped and encoded by its own worker
+process with the maps built once, then the encoded chunks are concatenated into one video per view.
+
+Example, run from the project root:
+    $ python3 -m src.video_export input.mp4 camera_parameter/20220707_entaniya_vr220_3_2592x1944_moil230_andy.json \\
+          --view front=anypoint:0,0,2 --view panorama:10,110 -o output/input.mp4 -j 4
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+
+from src.batch_dewarp import build_view_maps, open_map_store
+from src.models.map_store import parameter_digest
+from src.models.moil_maps import MoilMaps
+from src.models.video_index import load_keyframes
+from src.models.view_spec import ViewSpec
+
+PROGRESS_EVERY = 10
+
+_worker_maps = None
+_worker_progress = None
+
+
+def _init_worker(maps, progress_queue):
+    """
+        This function is for keep the maps and progress queue in every worker process
+    """
+    global _worker_maps, _worker_progress
+    cv2.setNumThreads(1)
+    _worker_maps = maps
+    _worker_progress = progress_queue
+
+
+def _export_chunk(source, start, stop, fps, fourcc, chunk_paths):
+    """
+        This function is for decode, dewarp and encode one frame range, run in worker process
+    Args:
+        source: path of video
+        start: first frame of chunk
+        stop: frame after the last frame of chunk, None read to the end of video
+        fps: frame per second of output
+        fourcc: fourcc code of output
+        chunk_paths: dictionary of view name and path of chunk file
+
+    Returns:
+        number of frames
+    """
+    cap = cv2.VideoCapture(source)
+    if start:
+        # start is a keyframe when the video has a keyframe index, otherwise the decoder seek to the keyframe
+        # before start and decode forward to start
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    writers = {}
+    for name, (map1, _) in _worker_maps.items():
+        writers[name] = cv2.VideoWriter(chunk_paths[name], cv2.VideoWriter_fourcc(*fourcc), fps,
+                                        (map1.shape[1], map1.shape[0]))
+    frames = 0
+    reported = 0
+    while stop is None or start + frames < stop:
+        success, frame = cap.read()
+        if not success:
+            break
+        for name, (map1, map2) in _worker_maps.items():
+            writers[name].write(cv2.remap(frame, map1, map2, cv2.INTER_LINEAR))
+        frames += 1
+        if frames - reported >= PROGRESS_EVERY:
+            _worker_progress.put(frames - reported)
+            reported = frames
+    _worker_progress.put(frames - reported)
+    cap.release()
+    for writer in writers.values():
+        writer.release()
+    return frames
+
+
+def split_chunks(frame_count, chunks, keyframes=None):
+    """
+        This function is for split frames into frame ranges, the last range read to the end of video.
+        With keyframes, every range start on the keyframe nearest to the equal split, so a worker does not
+        decode frames before its range; ranges that fall on the same keyframe are merged
+    Args:
+        frame_count: number of frames
+        chunks: number of ranges
+        keyframes: sorted list of keyframe positions, None split into equal ranges
+
+    Returns:
+        list of (start, stop)
+    """
+    chunks = max(1, min(chunks, frame_count))
+    bounds = [frame_count * i // chunks for i in range(chunks)]
+    if keyframes:
+        bounds = sorted({0} | {min(keyframes, key=lambda keyframe: abs(keyframe - bound)) for bound in bounds[1:]})
+        bounds = [bound for bound in bounds if bound < frame_count]
+    return [(start, bounds[i + 1] if i + 1 < len(bounds) else None) for i, start in enumerate(bounds)]
+
+
+def concatenate(chunk_files, output_path, fps, fourcc):
+    """
+        This function is for concatenate encoded chunks, with ffmpeg stream copy when ffmpeg is installed,
+        otherwise the chunks are decoded and encoded again with OpenCV
+    Args:
+        chunk_files: list of chunk path in order
+        output_path: path of output video
+        fps: frame per second of output
+        fourcc: fourcc code of output
+
+    Returns:
+        None
+    """
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is not None:
+        list_path = output_path + ".concat.txt"
+        with open(list_path, "w") as file:
+            file.writelines("file '%s'\n" % os.path.abspath(path) for path in chunk_files)
+        try:
+            subprocess.run([ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+                            "-c", "copy", output_path], check=True)
+            return
+        except subprocess.CalledProcessError:
+            pass
+        finally:
+            os.remove(list_path)
+    writer = None
+    for path in chunk_files:
+        cap = cv2.VideoCapture(path)
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            if writer is None:
+                writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps,
+                                         (frame.shape[1], frame.shape[0]))
+            writer.write(frame)
+        cap.release()
+    if writer is not None:
+        writer.release()
+
+
+def output_paths(output_path, views):
+    """
+        This function is for get output path of every view, the view name is added when there are several views
+    Args:
+        output_path: path of output video
+        views: list of ViewSpec
+
+    Returns:
+        dictionary of view name and output path
+    """
+    if len(views) == 1:
+        return {views[0].name: output_path}
+    stem, extension = os.path.splitext(output_path)
+    return {view.name: "%s_%s%s" % (stem, view.name, extension) for view in views}
+
+
+def export_video(source, camera_parameter, views, output_path, workers=None, chunks=None, camera_name=None,
+                 fourcc="mp4v", progress=None, store_maps=True):
+    """
+        This function is for export dewarped views of a video with chunks encoded in parallel
+    Args:
+        source: path of fisheye video
+        camera_parameter: path of camera parameter json
+        views: list of ViewSpec
+        output_path: path of output video, view name is added when there are several views
+        workers: number of worker process, default is number of cpu
+        chunks: number of chunks, default is number of workers
+        camera_name: name of camera when the json file contain several cameras
+        fourcc: fourcc code of output
+        progress: function (frames_done, frame_count) called in this process while exporting
+        store_maps: read and write maps in the map store
+
+    Returns:
+        dictionary of frames, seconds, frames per second and output paths
+    """
+    names = [view.name for view in views]
+    if len(set(names)) != len(names):
+        raise ValueError("view names must be unique: %s" % ", ".join(names))
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise IOError("cannot open video %s" % source)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    workers = workers or os.cpu_count() or 1
+    index = load_keyframes(source)
+    keyframes = None
+    if index is not None:
+        keyframes, frame_count = index
+    ranges = split_chunks(frame_count, chunks or workers, keyframes)
+    outputs = output_paths(output_path, views)
+    for path in outputs.values():
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    start = time.perf_counter()
+    maps = build_view_maps(MoilMaps.from_json(camera_parameter, camera_name), views,
+                           map_store=open_map_store() if store_maps else None,
+                           digest=parameter_digest(camera_parameter, camera_name))
+    extension = os.path.splitext(output_path)[1] or ".mp4"
+    with tempfile.TemporaryDirectory(prefix="moil_export_") as directory, multiprocessing.Manager() as manager:
+        progress_queue = manager.Queue()
+        chunk_paths = [{name: os.path.join(directory, "%s_%04d%s" % (name, i, extension)) for name in maps}
+                       for i in range(len(ranges))]
+        frames_done = 0
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(maps, progress_queue)) as executor:
+            pending = {executor.submit(_export_chunk, source, first, stop, fps, fourcc, chunk_paths[i])
+                       for i, (first, stop) in enumerate(ranges)}
+            futures = list(pending)
+            while pending:
+                _, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                reported = frames_done
+                while True:
+                    try:
+                        frames_done += progress_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                if progress is not None and frames_done != reported:
+                    progress(frames_done, frame_count)
+            frames = sum(future.result() for future in futures)
+        for name, path in outputs.items():
+            concatenate([paths[name] for paths in chunk_paths], path, fps, fourcc)
+    seconds = time.perf_counter() - start
+    return {"frames": frames, "seconds": seconds, "fps": frames / seconds if seconds else 0.0, "outputs": outputs}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export dewarped views of a fisheye video")
+    parser.add_argument("source", help="fisheye video")
+    parser.add_argument("camera_parameter", help="camera parameter json file")
+    parser.add_argument("--view", action="append", required=True, type=ViewSpec.parse,
+                        help="view '[name=]anypoint:alpha,beta,zoom', '[name=]car:alpha,beta,roll,zoom' "
+                             "or '[name=]panorama:alpha_min,alpha_max', can be repeated")
+    parser.add_argument("-o", "--output", required=True, help="output video, view name is added for several views")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker process")
+    parser.add_argument("--chunks", type=int, default=None, help="number of chunks, default is number of workers")
+    parser.add_argument("--camera-name", default=None, help="camera name when the json contain several cameras")
+    parser.add_argument("--fourcc", default="mp4v", help="fourcc code of output video")
+    parser.add_argument("--no-map-store", action="store_true", help="do not read or write maps in the map store")
+    args = parser.parse_args(argv)
+
+    def print_progress(frames_done, frame_count):
+        sys.stdout.write("\r%d / %d frames" % (frames_done, frame_count))
+        sys.stdout.flush()
+
+    report = export_video(args.source, args.camera_parameter, args.view, args.output, args.workers, args.chunks,
+                          args.camera_name, args.fourcc, print_progress, not args.no_map_store)
+    print("\n%d frames in %.2f s, %.2f frames/second" % (report["frames"], report["seconds"], report["fps"]))
+    for path in report["outputs"].values():
+        print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
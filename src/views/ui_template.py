@@ -261,6 +261,13 @@ class Ui_MainWindow(object):
         self.btn_change_param = QtWidgets.QPushButton(self.frame_2)
         self.btn_change_param.setObjectName("btn_change_param")
         self.gridLayout.addWidget(self.btn_change_param, 0, 1, 1, 1)
+        self.btn_record = QtWidgets.QPushButton(self.frame_2)
+        self.btn_record.setCheckable(True)
+        self.btn_record.setObjectName("btn_record")
+        self.gridLayout.addWidget(self.btn_record, 1, 0, 1, 1)
+        self.btn_load_param = QtWidgets.QPushButton(self.frame_2)
+        self.btn_load_param.setObjectName("btn_load_param")
+        self.gridLayout.addWidget(self.btn_load_param, 1, 1, 1, 1)
         self.verticalLayout_5.addLayout(self.gridLayout)
         spacerItem1 = QtWidgets.QSpacerItem(20, 40, QtWidgets.QSizePolicy.Policy.Minimum, QtWidgets.QSizePolicy.Policy.Expanding)
         self.verticalLayout_5.addItem(spacerItem1)
@@ -300,6 +307,8 @@ class Ui_MainWindow(object):
         self.label_7.setText(_translate("MainWindow", "Original Image"))
         self.lbl_original.setText(_translate("MainWindow", "Original"))
         self.btn_save_image.setText(_translate("MainWindow", "Save Image"))
+        self.btn_record.setText(_translate("MainWindow", "Record"))
+        self.btn_load_param.setText(_translate("MainWindow", "Load Param"))
         self.btn_change_param.setText(_translate("MainWindow", "Change Param"))
 
 